@@ -0,0 +1,197 @@
+import os
+import sys
+import glob
+import gzip
+import json
+import argparse
+import contextlib
+
+from auditoria_logs import (
+    LIMITE_MUESTRAS, PATRON_INCREMENTAL, DIRECTORIO_ESTADO_INCREMENTAL, analizar_archivos, analizar_directorio_incremental,
+    generar_resumen, generar_detalle_csv, agrupar_eventos, combinar_patrones, aciertos_reglas
+)
+from instrumentacion import Instrumentacion, medir_etapa
+
+# Ejecución por lotes de la auditoría de logs desde la línea de comandos, sin Streamlit:
+#   python -m auditoria_cli analizar /var/log/app/*.log* --informe informe.docx --json resumen.json
+#   python -m auditoria_cli incremental /var/log/app --json resumen.json
+#   python -m auditoria_cli analizar app.log --metricas metricas.json --perfilar
+# El generador del informe Word (python-docx) solo se importa si se pide --informe.
+
+NOMBRES_CATEGORIAS = ['Errores', 'Advertencias', 'Eventos críticos', 'Otros eventos']
+
+# Expande las rutas y patrones glob recibidos; las rutas sin coincidencias se informan por la salida de error
+def expandir_rutas(patrones):
+    rutas = []
+    for patron in patrones:
+        coincidencias = sorted(glob.glob(patron)) if glob.has_magic(patron) else [patron]
+        coincidencias = [ruta for ruta in coincidencias if os.path.isfile(ruta)]
+        if not coincidencias:
+            print(f"Sin archivos para: {patron}", file=sys.stderr)
+        rutas.extend(coincidencias)
+    return rutas
+
+# Abre un archivo de logs en modo binario, descomprimiendo al vuelo los .gz
+def abrir_archivo(ruta):
+    return gzip.open(ruta, 'rb') if ruta.endswith('.gz') else open(ruta, 'rb')
+
+# Patrones temporales en formato JSON: periodo, ráfagas detectadas y mensajes más recurrentes
+def patrones_json(patrones, limite):
+    rango = patrones.rango()
+    return {
+        'inicio': str(rango[0]) if rango else None,
+        'fin': str(rango[1]) if rango else None,
+        'ancho_intervalo_minutos': patrones.ancho_minutos,
+        'eventos_sin_fecha': patrones.sin_fecha,
+        'rafagas': [
+            {**rafaga, 'inicio': str(rafaga['inicio']), 'fin': str(rafaga['fin'])}
+            for rafaga in patrones.detectar_rafagas()[:limite]
+        ],
+        'mensajes_recurrentes': [
+            {'severity': severity, 'plantilla': plantilla, 'ocurrencias': cantidad, 'ejemplo': ejemplo}
+            for severity, plantilla, cantidad, ejemplo in patrones.mensajes_recurrentes(limite)
+        ],
+    }
+
+# Resumen en formato JSON: conteos por categoría, tipos de evento más frecuentes de cada una y patrones temporales
+def resumen_json(resumen, resultado, archivos, limite_grupos, patrones):
+    return {
+        'resumen': resumen,
+        'archivos': archivos,
+        'tipos_de_evento': {
+            nombre: [
+                {
+                    'mensaje': str(grupo.mensaje), 'ocurrencias': grupo.cantidad,
+                    'primera_hora': str(grupo.primero), 'ultima_hora': str(grupo.ultimo),
+                    'explicacion': grupo.explicacion,
+                }
+                for grupo in agrupar_eventos(eventos)[:limite_grupos]
+            ]
+            for nombre, eventos in zip(NOMBRES_CATEGORIAS, resultado)
+        },
+        'patrones': patrones_json(patrones, limite_grupos),
+    }
+
+# Escribe un texto en la ruta indicada, o en la salida estándar si la ruta es '-'
+def escribir_texto(ruta, contenido):
+    if ruta == '-':
+        print(contenido)
+    else:
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            archivo.write(contenido)
+
+# Destino de los mensajes para el usuario (resumen, bytes leídos): la salida de error si alguna
+# salida JSON va a la salida estándar, para que esta contenga solo JSON válido
+def salida_mensajes(args):
+    return sys.stderr if '-' in (args.json, args.metricas) else sys.stdout
+
+# Escribe las salidas pedidas (resumen en consola, JSON, informe Word y detalle CSV)
+def escribir_salidas(args, resultado, total_logs, archivos, instrumentacion=None):
+    resumen = generar_resumen(*resultado)
+    patrones = None
+    if args.json or args.informe:
+        with medir_etapa(instrumentacion, 'patrones') as etapa:
+            patrones = combinar_patrones(*resultado)
+            etapa.filas += total_logs
+    for clave, valor in resumen.items():
+        print(f"{clave}: {valor}", file=salida_mensajes(args))
+    if args.json:
+        with medir_etapa(instrumentacion, 'resumen_json'):
+            escribir_texto(args.json, json.dumps(resumen_json(resumen, resultado, archivos, args.limite_grupos, patrones), ensure_ascii=False, indent=2))
+    if args.informe:
+        with medir_etapa(instrumentacion, 'informe_word') as etapa:
+            from informe_word import generar_informe_word
+            buffer = generar_informe_word(resumen, *resultado, total_logs, agrupado=not args.detallado, limite_filas=args.limite_filas, patrones=patrones, detalle_csv=bool(args.csv))
+            with open(args.informe, 'wb') as archivo:
+                archivo.write(buffer.getvalue())
+            etapa.filas += total_logs
+    if args.csv:
+        with medir_etapa(instrumentacion, 'detalle_csv') as etapa:
+            with open(args.csv, 'wb') as archivo:
+                archivo.write(generar_detalle_csv(*resultado).getvalue())
+            etapa.filas += total_logs
+
+def comando_analizar(args, instrumentacion=None):
+    rutas = expandir_rutas(args.rutas)
+    if not rutas:
+        return 1
+    cache = None
+    if args.cache:
+        from cache_resultados import CacheResultados
+        try:
+            cache = CacheResultados(args.cache_mb * 1024 * 1024, args.cache, args.cache_disco_mb * 1024 * 1024)
+        except OSError as error:
+            print(error, file=sys.stderr)
+            return 2
+    with contextlib.ExitStack() as pila:
+        archivos = [pila.enter_context(abrir_archivo(ruta)) for ruta in rutas]
+        resultado, total_logs, _ = analizar_archivos(archivos, args.vectorizado, args.procesos, cache, instrumentacion, args.compacto)
+    escribir_salidas(args, resultado, total_logs, rutas, instrumentacion)
+    return 0
+
+def comando_incremental(args, instrumentacion=None):
+    if not os.path.isdir(args.directorio):
+        print(f"No existe el directorio: {args.directorio}", file=sys.stderr)
+        return 1
+    with medir_etapa(instrumentacion, 'analisis_incremental') as etapa:
+        resultado, bytes_leidos = analizar_directorio_incremental(args.directorio, args.patron, args.estado, args.directorio_estado)
+        total_logs = generar_resumen(*resultado)['Total de logs']
+        etapa.filas += total_logs
+        etapa.bytes_leidos += bytes_leidos
+    if instrumentacion is not None:
+        instrumentacion.contar_aciertos(aciertos_reglas(resultado))
+    print(f"Bytes nuevos leídos: {bytes_leidos}", file=salida_mensajes(args))
+    escribir_salidas(args, resultado, total_logs, [args.directorio], instrumentacion)
+    return 0
+
+# Opciones de salida comunes a todos los comandos
+def agregar_opciones_salida(parser):
+    parser.add_argument('--json', help="Ruta del resumen en JSON ('-' para la salida estándar)")
+    parser.add_argument('--informe', help="Ruta del informe Word (.docx)")
+    parser.add_argument('--csv', help="Ruta del detalle de eventos en CSV")
+    parser.add_argument('--detallado', action='store_true', help="Informe con una fila por evento en lugar de agrupado")
+    parser.add_argument('--limite-filas', type=int, default=20, help="Eventos de ejemplo por sección en el informe agrupado")
+    parser.add_argument('--limite-grupos', type=int, default=50, help="Tipos de evento por categoría, ráfagas y mensajes recurrentes en el JSON")
+    parser.add_argument('--metricas', help="Ruta de las métricas de rendimiento en JSON ('-' para la salida estándar)")
+    parser.add_argument('--perfilar', action='store_true', help="Incluye en las métricas un perfil de cProfile")
+    parser.add_argument('--perfilar-memoria', action='store_true', help="Mide el pico de memoria de cada etapa con tracemalloc (más lento)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='auditoria_cli', description="Auditoría de logs del sistema por lotes")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    analizar = subparsers.add_parser('analizar', help="Analiza archivos .log, .xlsx, .csv o .parquet (también .gz y globs)")
+    analizar.add_argument('rutas', nargs='+')
+    analizar.add_argument('--procesos', type=int, default=1, help=f"Procesos en paralelo; con más de uno se conservan {LIMITE_MUESTRAS} eventos de ejemplo por categoría")
+    analizar.add_argument('--vectorizado', action='store_true', help="Análisis vectorizado con pandas")
+    analizar.add_argument('--compacto', action='store_true', help="Guarda los eventos en un almacén compacto: mucha menos memoria con logs grandes, análisis más lento")
+    analizar.add_argument('--cache', help="Directorio privado de la caché de resultados por contenido (se carga con pickle)")
+    analizar.add_argument('--cache-mb', type=int, default=512, help="Memoria máxima de la caché en MB")
+    analizar.add_argument('--cache-disco-mb', type=int, default=2048, help="Espacio máximo de la caché en disco en MB")
+    agregar_opciones_salida(analizar)
+    analizar.set_defaults(funcion=comando_analizar)
+
+    incremental = subparsers.add_parser('incremental', help="Analiza solo los datos nuevos de los logs de un directorio")
+    incremental.add_argument('directorio')
+    incremental.add_argument('--patron', default=PATRON_INCREMENTAL)
+    incremental.add_argument('--estado', help="Archivo JSON de puntos de control (por defecto uno por directorio en --directorio-estado)")
+    incremental.add_argument('--directorio-estado', help=f"Directorio de los puntos de control (por defecto {DIRECTORIO_ESTADO_INCREMENTAL})")
+    agregar_opciones_salida(incremental)
+    incremental.set_defaults(funcion=comando_incremental)
+
+    args = parser.parse_args(argv)
+    if args.json == '-' and args.metricas == '-':
+        parser.error("--json y --metricas no pueden ir ambos a la salida estándar")
+    if not (args.metricas or args.perfilar or args.perfilar_memoria):
+        return args.funcion(args)
+    with Instrumentacion(args.perfilar, args.perfilar_memoria) as instrumentacion:
+        codigo = args.funcion(args, instrumentacion)
+    metricas = instrumentacion.a_json()
+    if args.metricas:
+        escribir_texto(args.metricas, metricas)
+    else:
+        print(metricas, file=sys.stderr)
+    return codigo
+
+if __name__ == "__main__":
+    sys.exit(main())
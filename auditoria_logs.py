@@ -0,0 +1,1789 @@
+import io
+import os
+import re
+import csv
+import sys
+import copy
+import glob
+import json
+import hashlib
+import codecs
+import datetime
+import functools
+import itertools
+from array import array
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from cache_resultados import huella_contenido
+from instrumentacion import medir_etapa, medir_iterable
+
+# Lectura, clasificación y análisis de logs de sistema, sin dependencia de Streamlit.
+# pandas, numpy y openpyxl se importan solo en las funciones que los usan, para que el análisis
+# de archivos .log arranque rápido desde la línea de comandos.
+
+# Función que muestra los errores de lectura; por defecto escribe en la salida de error y la
+# interfaz puede sustituirla (por ejemplo por st.error) con establecer_manejador_errores
+def _error_en_consola(mensaje):
+    print(mensaje, file=sys.stderr)
+
+_manejador_errores = _error_en_consola
+
+def establecer_manejador_errores(funcion):
+    global _manejador_errores
+    _manejador_errores = funcion
+
+# Número de errores reportados desde el inicio del proceso; al compararlo antes y después de un
+# cálculo se sabe si hubo errores durante él (el resultado puede estar vacío o incompleto)
+_errores_reportados = 0
+
+def reportar_error(mensaje):
+    global _errores_reportados
+    _errores_reportados += 1
+    _manejador_errores(mensaje)
+
+def errores_reportados():
+    return _errores_reportados
+
+# Tamaño de bloque (en bytes) para la lectura por partes de los archivos .log
+TAMANO_BLOQUE = 1 << 20
+
+# Generador que lee un archivo .log por bloques de tamaño fijo y devuelve sus líneas una a una.
+# La memoria usada depende del tamaño de bloque y no del tamaño del archivo.
+def leer_lineas(file, tamano_bloque=TAMANO_BLOQUE):
+    decodificador = codecs.getincrementaldecoder('latin-1')()
+    resto = ''
+    while True:
+        bloque = file.read(tamano_bloque)
+        if not bloque:
+            break
+        lineas = (resto + decodificador.decode(bloque)).splitlines(True)
+        # La última línea puede estar incompleta (o ser la mitad de un '\r\n'): se guarda para el siguiente bloque
+        resto = lineas.pop() if lineas else ''
+        for linea in lineas:
+            yield linea[:-2] if linea.endswith('\r\n') else linea[:-1]
+    resto += decodificador.decode(b'', final=True)
+    yield from resto.splitlines()
+
+# Registro de log estructurado; conserva el orden (severity, message, timestamp) para el acceso por posición
+RegistroLog = namedtuple('RegistroLog', ['severity', 'message', 'timestamp'])
+
+# Normalización de los niveles de severidad habituales a los usados en el análisis
+NIVELES_SEVERIDAD = {
+    'CRITICAL': 'CRITICAL', 'CRIT': 'CRITICAL', 'FATAL': 'CRITICAL', 'EMERG': 'CRITICAL', 'ALERT': 'CRITICAL',
+    'ERROR': 'ERROR', 'ERR': 'ERROR',
+    'WARNING': 'WARNING', 'WARN': 'WARNING',
+    'NOTICE': 'INFO', 'INFO': 'INFO', 'DEBUG': 'DEBUG', 'TRACE': 'DEBUG',
+}
+
+_FECHA_ISO = r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?'
+_NIVELES_MAYUSCULAS = '(?:' + '|'.join(sorted(NIVELES_SEVERIDAD, key=len, reverse=True)) + ')'
+_NIVELES = '(?i:' + _NIVELES_MAYUSCULAS[3:]
+# Nivel delante del mensaje. Sin corchetes ni dos puntos solo se acepta en mayúsculas y seguido de un
+# espacio, para no tomar como nivel la primera palabra de un mensaje ("Alert rule disabled",
+# "Notice of change"); entre corchetes o seguido de ':' se acepta en cualquier combinación de mayúsculas.
+_NIVEL = (
+    rf'(?:(?P<corchete>\[)|(?={_NIVELES_MAYUSCULAS}(?:\s|$))|(?={_NIVELES}:))'
+    rf'(?P<severity>{_NIVELES})(?(corchete)\]:?|:?)'
+)
+
+# Formatos de línea reconocidos, en el orden en que se prueban cuando no hay uno detectado.
+# Cada patrón define los grupos 'severity', 'timestamp' y 'message'.
+FORMATOS_LOG = {
+    # 2024-05-01 12:00:00,123 ERROR Mensaje  /  2024-05-01T12:00:00Z [ERROR] Mensaje (nivel opcional)
+    'iso': re.compile(rf'(?P<timestamp>{_FECHA_ISO})\s+(?:{_NIVEL}\s+)?(?P<message>.*)'),
+    # [ERROR] 2024-05-01 12:00:00 Mensaje  /  [ERROR] Mensaje
+    'corchetes': re.compile(rf'\[(?P<severity>{_NIVELES})\]:?\s+(?:(?P<timestamp>{_FECHA_ISO})\s+)?(?P<message>.*)'),
+    # May  1 12:00:00 host programa[123]: ERROR: Mensaje (el nivel es opcional en syslog)
+    'syslog': re.compile(
+        r'(?P<timestamp>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}) \S+ [^\s:\[]+(?:\[\d+\])?:\s+'
+        rf'(?:{_NIVEL}\s+)?(?P<message>.*)'
+    ),
+}
+
+# Interpreta una línea con un formato; devuelve None si no coincide
+def _parsear_linea(patron, linea):
+    coincidencia = patron.match(linea)
+    if coincidencia is None:
+        return None
+    severity, timestamp, message = coincidencia.group('severity', 'timestamp', 'message')
+    severity = NIVELES_SEVERIDAD[severity.upper()] if severity else ''
+    return RegistroLog(severity, message, timestamp or '')
+
+# Elige el formato que interpreta más líneas de la muestra; devuelve los formatos ordenados por aciertos
+def detectar_formato(muestra, formatos=None):
+    formatos = FORMATOS_LOG if formatos is None else formatos
+    aciertos = Counter()
+    for linea in muestra:
+        for nombre, patron in formatos.items():
+            if _parsear_linea(patron, linea) is not None:
+                aciertos[nombre] += 1
+    return sorted(formatos, key=lambda nombre: -aciertos[nombre])
+
+# Generador que convierte líneas de texto en registros estructurados.
+# El formato se detecta con una muestra de las primeras líneas; las líneas que no encajan prueban
+# el resto de formatos y, si ninguno coincide, se conservan completas como mensaje sin severidad.
+def parsear_lineas(lineas, formatos=None, tamano_muestra=200):
+    formatos = FORMATOS_LOG if formatos is None else formatos
+    lineas = iter(lineas)
+    muestra = list(itertools.islice(lineas, tamano_muestra))
+    patrones = [formatos[nombre] for nombre in detectar_formato(muestra, formatos)]
+    principal, alternativos = patrones[0], patrones[1:]
+    for linea in itertools.chain(muestra, lineas):
+        registro = _parsear_linea(principal, linea)
+        if registro is None:
+            for patron in alternativos:
+                registro = _parsear_linea(patron, linea)
+                if registro is not None:
+                    break
+            else:
+                registro = RegistroLog('', linea, '')
+        yield registro
+
+# Columnas que debe tener un archivo tabular de logs (.xlsx, .csv o .parquet)
+COLUMNAS_LOG = ['Severity', 'Message', 'Timestamp']
+
+# Número de filas por bloque al leer archivos .csv
+TAMANO_LOTE_CSV = 100_000
+
+# Comprueba que estén las columnas de logs; si falta alguna, muestra el error y devuelve False
+def _validar_columnas(columnas):
+    if all(columna in columnas for columna in COLUMNAS_LOG):
+        return True
+    reportar_error("No se encontraron las columnas 'Severity', 'Message' o 'Timestamp' en el archivo.")
+    return False
+
+# Abre un .xlsx en modo de solo lectura y devuelve un generador de registros que lee, fila a fila,
+# solo el rango de columnas que contiene las columnas de logs; devuelve None si faltan columnas
+def _leer_excel(file):
+    import openpyxl
+    libro = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    hoja = libro.worksheets[0]
+    encabezado = next(hoja.iter_rows(max_row=1, values_only=True), ())
+    if not _validar_columnas(encabezado):
+        libro.close()
+        return None
+    posiciones = [encabezado.index(columna) for columna in COLUMNAS_LOG]
+    primera = min(posiciones)
+
+    def filas():
+        try:
+            for fila in hoja.iter_rows(min_row=2, min_col=primera + 1, max_col=max(posiciones) + 1, values_only=True):
+                valores = [fila[posicion - primera] if posicion - primera < len(fila) else None for posicion in posiciones]
+                if valores != [None, None, None]:
+                    yield RegistroLog(*valores)
+        finally:
+            libro.close()
+    return filas()
+
+# Abre un .csv y devuelve un generador de registros leído por bloques con solo las columnas de logs
+def _leer_csv(file):
+    import pandas as pd
+    bloques = pd.read_csv(file, usecols=lambda columna: columna in COLUMNAS_LOG, chunksize=TAMANO_LOTE_CSV)
+    primero = next(bloques, None)
+    if primero is None or not _validar_columnas(primero.columns):
+        # Se cierra el lector sin cerrar 'file': si se abandona, al destruirse cierra también el archivo
+        bloques.close()
+        return None
+    return (
+        RegistroLog(*fila)
+        for bloque in itertools.chain([primero], bloques)
+        for fila in bloque[COLUMNAS_LOG].itertuples(index=False, name=None)
+    )
+
+# Abre un .parquet (requiere pyarrow) y devuelve un generador de registros por lotes con solo las columnas de logs
+def _leer_parquet(file):
+    import pyarrow.parquet as pq
+    archivo = pq.ParquetFile(file)
+    if not _validar_columnas(archivo.schema_arrow.names):
+        return None
+    return (
+        RegistroLog(*fila)
+        for lote in archivo.iter_batches(columns=COLUMNAS_LOG)
+        for fila in zip(*(lote.column(columna).to_pylist() for columna in COLUMNAS_LOG))
+    )
+
+# Lectores de archivos tabulares por extensión
+LECTORES_TABULARES = {
+    '.xlsx': _leer_excel,
+    '.csv': _leer_csv,
+    '.parquet': _leer_parquet,
+}
+
+# Extensión que determina cómo se lee un archivo: ignora la compresión .gz y trata los logs
+# rotados (app.log.1) como .log
+def extension_logs(nombre):
+    if nombre.endswith('.gz'):
+        nombre = nombre[:-3]
+    if re.search(r'\.log\.\d+$', nombre):
+        return '.log'
+    return os.path.splitext(nombre)[1]
+
+# Recorre los registros de un lector perezoso; los errores que aparecen durante la lectura (un .csv
+# mal formado a mitad de archivo, un .gz truncado) se informan con reportar_error y terminan la
+# lectura, conservando los registros ya leídos
+def _registros_protegidos(registros):
+    try:
+        yield from registros
+    except Exception as e:
+        reportar_error(f"Error al leer el archivo: {e}")
+
+# Función para leer los logs desde el archivo subido
+def leer_logs(file):
+    try:
+        extension = extension_logs(file.name)
+        if extension == '.log':
+            return _registros_protegidos(parsear_lineas(leer_lineas(file)))
+        elif extension in LECTORES_TABULARES:
+            filas = LECTORES_TABULARES[extension](file)
+            return _registros_protegidos(filas) if filas is not None else []
+        else:
+            reportar_error("Formato de archivo no soportado. Suba un archivo .log, .xlsx, .csv o .parquet")
+            return []
+    except Exception as e:
+        reportar_error(f"Error al leer el archivo: {e}")
+        return []
+
+# Función para leer los logs del archivo subido como DataFrame (modo vectorizado)
+def leer_logs_df(file):
+    import pandas as pd
+    try:
+        extension = extension_logs(file.name)
+        if extension == '.log':
+            return pd.DataFrame.from_records(parsear_lineas(leer_lineas(file)), columns=COLUMNAS_LOG)
+        elif extension in LECTORES_TABULARES:
+            filas = LECTORES_TABULARES[extension](file)
+            if filas is not None:
+                return pd.DataFrame.from_records(filas, columns=COLUMNAS_LOG)
+        else:
+            reportar_error("Formato de archivo no soportado. Suba un archivo .log, .xlsx, .csv o .parquet")
+    except Exception as e:
+        reportar_error(f"Error al leer el archivo: {e}")
+    return pd.DataFrame(columns=COLUMNAS_LOG)
+
+# Reglas de clasificación de mensajes: (identificador, texto buscado, explicación).
+# El orden es la prioridad: si un mensaje contiene varios textos, gana la primera regla de la lista.
+REGLAS = [
+    ('conexion_bd', "Database connection failed",
+     "Fallo en la conexión con la base de datos. Esto podría deberse a credenciales incorrectas, un problema con la red, o el servicio de base de datos no está disponible."),
+    ('api_inalcanzable', "Unable to reach API endpoint",
+     "No se pudo comunicar con el endpoint de la API. Verifique la URL del endpoint, la conectividad de red y la disponibilidad del servicio."),
+    ('respaldo_fallido', "Failed to back up database",
+     "La copia de seguridad falló. Posibles causas incluyen falta de espacio en disco, permisos insuficientes, o problemas con el servicio de respaldo."),
+    ('memoria_alta', "High memory usage detected",
+     "Uso elevado de memoria detectado. Revise los procesos en ejecución, posibles fugas de memoria o configuraciones inadecuadas de aplicaciones."),
+    ('disco_bajo', "Disk space low",
+     "Espacio en disco insuficiente. Se recomienda liberar espacio eliminando archivos innecesarios o ampliar la capacidad de almacenamiento."),
+    ('respuesta_lenta', "Slow response time",
+     "El sistema responde lentamente. Podría ser debido a alta carga de CPU, cuellos de botella en el acceso a la base de datos, o problemas de red."),
+    ('caida_sistema', "System outage detected",
+     "Interrupción del sistema detectada. Verifique la integridad del hardware, la configuración de la red, y el estado de los servicios críticos."),
+    ('brecha_seguridad', "Security breach detected",
+     "Posible brecha de seguridad detectada. Revise los logs de acceso, cambie contraseñas comprometidas, y considere fortalecer las medidas de seguridad."),
+    ('caida_aplicacion', "Application crash",
+     "Una aplicación se bloqueó. Revise los registros de la aplicación para identificar la causa del fallo y considere implementar mecanismos de recuperación."),
+    ('sesion_usuario_expirada', "User session timeout",
+     "La sesión del usuario expiró. Esto podría deberse a configuraciones de tiempo de espera muy bajas o a inactividad prolongada del usuario."),
+    ('acceso_no_autorizado', "Unauthorized access attempt",
+     "Intento de acceso no autorizado detectado. Revise los registros de seguridad para identificar al actor y considere aumentar las medidas de protección."),
+    ('sobrecarga_servidor', "Server overload",
+     "El servidor está sobrecargado. Considere optimizar las aplicaciones, balancear la carga o aumentar los recursos del servidor."),
+    ('sincronizacion_datos', "Data synchronization error",
+     "Error en la sincronización de datos. Verifique las conexiones de red, la consistencia de datos y los procesos de sincronización."),
+    ('limite_api', "API rate limit exceeded",
+     "Límite de tasa de API excedido. Optimice las llamadas a la API para evitar exceder los límites y considere implementar un manejo de tasas."),
+    ('entrada_invalida', "Invalid input detected",
+     "Se ha detectado una entrada inválida. Asegúrese de que los datos introducidos cumplen con los formatos y requisitos esperados."),
+    ('restablecer_contrasena', "Password reset requested",
+     "Solicitud de restablecimiento de contraseña detectada. Verifique si se trata de una solicitud legítima y si es necesario tomar medidas adicionales."),
+    ('login_fallido', "Failed login attempt detected",
+     "Intento de inicio de sesión fallido detectado. Puede ser indicativo de intentos de acceso no autorizados o errores en la autenticación del usuario."),
+    ('sesion_expirada', "Session timeout",
+     "Tiempo de sesión agotado. Los usuarios han sido desconectados por inactividad prolongada o debido a políticas de seguridad."),
+    ('informe_programado', "Scheduled report generated",
+     "Un informe programado se ha generado correctamente. Revise el contenido para asegurar que los datos presentados son precisos y relevantes."),
+    ('registro_cliente', "Customer record updated",
+     "El registro de un cliente ha sido actualizado. Verifique los cambios para asegurar que se reflejan correctamente en el sistema."),
+    ('exportacion_datos', "Data export completed",
+     "Exportación de datos completada. Revise el archivo exportado para confirmar que todos los datos necesarios están presentes y son correctos."),
+    ('login_exitoso', "User logged in successfully",
+     "Inicio de sesión exitoso. El usuario ha accedido al sistema correctamente."),
+]
+
+# Explicación de los mensajes que no coinciden con ninguna regla
+def explicar_no_reconocido(message):
+    return f"Evento no reconocido: {message}. Es necesario realizar un análisis detallado para identificar la causa y el impacto potencial."
+
+# Expresión regular que reconoce cualquiera de los textos. Las alternativas se organizan como un
+# árbol de prefijos, así que en cada posición del mensaje el motor sigue un único camino en lugar
+# de probar los textos uno a uno. Si varios textos empiezan en la misma posición, reconoce el más largo.
+def _patron_textos(textos):
+    arbol = {}
+    for texto in textos:
+        nodo = arbol
+        for caracter in texto:
+            nodo = nodo.setdefault(caracter, {})
+        nodo[''] = None
+
+    def patron(nodo):
+        alternativas = [re.escape(caracter) + patron(hijo) for caracter, hijo in nodo.items() if caracter]
+        if not alternativas:
+            return ''
+        if len(alternativas) == 1 and '' not in nodo:
+            return alternativas[0]
+        return '(?:' + '|'.join(alternativas) + (')?' if '' in nodo else ')')
+    return re.compile(patron(arbol))
+
+# Indica si algún texto puede empezar dentro de otro y terminar después de él (un sufijo de uno es
+# el principio de otro). Si no ocurre, las reglas presentes en un mensaje que no están entre las
+# coincidencias que no se solapan están contenidas en alguna de ellas.
+def _textos_solapados(textos):
+    prefijos = {}
+    for texto in textos:
+        for longitud in range(1, len(texto)):
+            prefijos.setdefault(texto[:longitud], set()).add(texto)
+    return any(prefijos.get(texto[inicio:], {texto}) != {texto} for texto in textos for inicio in range(1, len(texto)))
+
+# Clasificador de mensajes compilado una sola vez a partir de una tabla de reglas. Una sola búsqueda
+# con la expresión combinada de todos los textos devuelve las coincidencias que no se solapan. La
+# regla de cada coincidencia es la de más prioridad entre los textos contenidos en ella, calculada de
+# antemano, así que se mantiene el orden de la primera coincidencia de la cadena if/elif original.
+# Si la tabla tiene textos que se solapan, tras cada coincidencia se buscan solo las reglas de más
+# prioridad, con la expresión de los textos anteriores, hasta que ninguna aparece.
+class Clasificador:
+    def __init__(self, reglas):
+        self.reglas = list(reglas)
+        self._textos = [texto for _, texto, _ in self.reglas]
+        self._posiciones = {}
+        for posicion, texto in enumerate(self._textos):
+            self._posiciones.setdefault(texto, posicion)
+        # Regla de más prioridad entre los textos contenidos en cada texto: si el texto aparece, ellos también
+        self._mejor = {
+            texto: min(posicion for otro, posicion in self._posiciones.items() if otro in texto) for texto in self._posiciones
+        }
+        # (identificador de regla, explicación) de la regla que corresponde a cada texto reconocido
+        self._resultados = {texto: self.reglas[posicion][::2] for texto, posicion in self._mejor.items()}
+        patron = _patron_textos(self._posiciones) if self._posiciones else None
+        self._buscar = patron.search if patron is not None else None
+        self._buscar_todas = patron.findall if patron is not None and not _textos_solapados(self._posiciones) else None
+        # Búsqueda de los textos de más prioridad que cada regla, compilada la primera vez que se necesita
+        self._anteriores = {}
+
+    def _buscar_anteriores(self, posicion):
+        buscar = self._anteriores.get(posicion)
+        if buscar is None:
+            buscar = self._anteriores[posicion] = _patron_textos(self._textos[:posicion]).search
+        return buscar
+
+    # Devuelve la posición de la primera regla (en orden de prioridad) presente en el mensaje, o -1
+    def buscar(self, message):
+        if self._buscar_todas is not None:
+            coincidencias = self._buscar_todas(message)
+            if not coincidencias:
+                return -1
+            if len(coincidencias) == 1:
+                return self._mejor[coincidencias[0]]
+            return min(map(self._mejor.__getitem__, coincidencias))
+        coincidencia = self._buscar(message) if self._buscar is not None else None
+        if coincidencia is None:
+            return -1
+        # La primera coincidencia es la más a la izquierda de todas las reglas, así que las de más
+        # prioridad que no están contenidas en ella empiezan después de su inicio
+        posicion = self._mejor[coincidencia.group()]
+        while posicion:
+            coincidencia = self._buscar_anteriores(posicion)(message, coincidencia.start() + 1)
+            if coincidencia is None:
+                break
+            posicion = self._mejor[coincidencia.group()]
+        return posicion
+
+    # Devuelve (identificador de regla, explicación); el identificador es None si ninguna regla coincide.
+    # El caso habitual, una sola coincidencia, se resuelve sin pasar por buscar().
+    def clasificar(self, message):
+        if self._buscar_todas is not None:
+            coincidencias = self._buscar_todas(message)
+            if len(coincidencias) == 1:
+                return self._resultados[coincidencias[0]]
+        posicion = self.buscar(message)
+        if posicion < 0:
+            return None, explicar_no_reconocido(message)
+        regla_id, _, explicacion = self.reglas[posicion]
+        return regla_id, explicacion
+
+CLASIFICADOR = Clasificador(REGLAS)
+
+# Versión de la estructura de los resultados parciales guardados (caché y puntos de control)
+VERSION_RESULTADOS = 7
+
+# Versión del conjunto de reglas y formatos de línea; forma parte de las claves de la caché para
+# que cualquier cambio en la clasificación invalide los resultados guardados
+VERSION_REGLAS = hashlib.sha256(
+    repr((REGLAS, NIVELES_SEVERIDAD, [patron.pattern for patron in FORMATOS_LOG.values()], VERSION_RESULTADOS)).encode('utf-8')
+).hexdigest()[:16]
+
+# Partes variables de los mensajes: cualquier secuencia que empiece por un dígito, con las letras,
+# puntos, dos puntos y guiones que la siguen (números, horas, direcciones IP, UUID, identificadores
+# hexadecimales). Es una sola expresión anclada en el dígito para que el coste por mensaje sea bajo.
+_PARTES_VARIABLES = re.compile(r'\d[\w.:-]*')
+_PARTES_VARIABLES_SEPARADAS = re.compile(rf'({_PARTES_VARIABLES.pattern})')
+
+# Plantilla de un mensaje: el texto con las partes variables sustituidas por <N>, para contar juntos
+# los mensajes que solo difieren en números o identificadores
+@functools.lru_cache(maxsize=1 << 12)
+def normalizar_mensaje(message):
+    return _PARTES_VARIABLES.sub('<N>', message)
+
+# Separa un mensaje en sus partes literales (tupla) y sus partes variables, unidas por '\x00' y
+# codificadas en UTF-8 (una parte variable nunca contiene '\x00'). Sin caché: las partes variables
+# hacen que casi cada mensaje sea distinto.
+def _separar_plantilla(message):
+    partes = _PARTES_VARIABLES_SEPARADAS.split(message)
+    return tuple(partes[0::2]), '\x00'.join(partes[1::2]).encode('utf-8', 'surrogateescape')
+
+# Plantilla reservada para los mensajes que no son texto (celdas numéricas o vacías de un .xlsx)
+SIN_PLANTILLA = 0xFFFFFFFF
+
+# Identificador de severidad reservado para las severidades que no caben en la tabla (más de 255 distintas)
+SEVERIDAD_OTRA = 0xFF
+
+_NAN = float('nan')
+
+_MESES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Formatos de fecha del almacén de eventos: vacía, datetime sin zona horaria (guardado como
+# microsegundos desde el año 1), valor guardado aparte, y a partir de FECHA_TEXTO las formas de
+# fecha en texto internadas en la tabla 'formas_fecha' del almacén
+FECHA_VACIA, FECHA_DATETIME, FECHA_OTRA, FECHA_TEXTO = range(4)
+
+# Máximo de dígitos de una fecha en texto que caben en un entero de 64 bits
+MAX_DIGITOS_FECHA = 18
+
+# Tablas para separar una fecha en texto ASCII, codificada como bytes, en su forma (la fecha con cada
+# dígito sustituido por '0') y sus dígitos; bytes.translate las aplica sin expresiones regulares ni
+# caché. Las fechas con caracteres no ASCII se guardan aparte.
+_FORMA_FECHA = bytes.maketrans(b'0123456789', b'0' * 10)
+_NO_DIGITOS = bytes(caracter for caracter in range(256) if not 0x30 <= caracter <= 0x39)
+
+# Caracteres de una fecha en texto cuyos dígitos determinan el minuto del evento; el resto de
+# dígitos (segundos, fracciones, zona horaria) se descarta al agrupar por minuto
+CARACTERES_MINUTO_FECHA = 16
+
+# Cadena de formato con '%s' en el lugar de cada parte variable, para reconstruir un texto a partir
+# de sus partes literales
+def _formato_literales(literales):
+    return '%s'.join(literal.replace('%', '%%') for literal in literales)
+
+# Datos para reconstruir las fechas de una forma: 10 elevado al número de dígitos (sumado al valor,
+# su representación sin el primer carácter son los dígitos con los ceros a la izquierda) y cadena
+# de formato con un '%s' por dígito
+def _reconstruccion_fecha(forma):
+    return 10 ** forma.count(b'0'), _formato_literales(forma.decode('latin-1').split('0'))
+
+# Almacén compacto de los eventos de un análisis, por columnas:
+#  - mensaje: identificador de plantilla (partes literales internadas) y partes variables en un
+#    único búfer de bytes con su posición final en 'fin_parametros'
+#  - severidad: identificador (un byte) en la tabla 'severidades'
+#  - regla: posición de la regla del clasificador (-1 si no se reconoce); la explicación se obtiene
+#    de la regla, o del mensaje si no se reconoce, en lugar de guardarse por evento
+#  - fecha: entero y formato (ver FECHA_*); las fechas en texto se guardan como sus dígitos más
+#    el identificador de su forma, y se reconstruyen exactamente
+# Los valores que no encajan en estas columnas (mensajes que no son texto, datetime con zona horaria,
+# fechas en texto con demasiados dígitos, severidades y formas de fecha por encima de sus tablas)
+# se guardan aparte en 'otros_valores'.
+class AlmacenEventos:
+    def __init__(self, clasificador=CLASIFICADOR):
+        self.clasificador = clasificador
+        self.plantillas = []
+        self.formatos_plantillas = []
+        self._ids_plantillas = {}
+        self.severidades = []
+        self._ids_severidades = {}
+        self.id_plantilla = array('I')
+        self.fin_parametros = array('Q')
+        self.parametros = bytearray()
+        self.id_severidad = array('B')
+        self.reglas = array('h')
+        self.fechas = array('q')
+        self.formato_fecha = array('B')
+        self.formas_fecha = []
+        self.reconstruccion_fechas = []
+        self._ids_formas_fecha = {}
+        self.otros_valores = {}
+
+    def __len__(self):
+        return len(self.reglas)
+
+    def _internar_severidad(self, severity, posicion):
+        clave = severity if severity == severity else _NAN
+        id_severidad = self._ids_severidades.get(clave)
+        if id_severidad is None:
+            if len(self.severidades) >= SEVERIDAD_OTRA:
+                self.otros_valores['severity', posicion] = severity
+                return SEVERIDAD_OTRA
+            id_severidad = self._ids_severidades[clave] = len(self.severidades)
+            self.severidades.append(severity)
+        return id_severidad
+
+    def _internar_plantilla(self, literales):
+        id_plantilla = self._ids_plantillas[literales] = len(self.plantillas)
+        self.plantillas.append(literales)
+        self.formatos_plantillas.append(_formato_literales(literales))
+        return id_plantilla
+
+    def _internar_forma_fecha(self, forma):
+        if len(self.formas_fecha) >= 256 - FECHA_TEXTO or forma.count(b'0') > MAX_DIGITOS_FECHA:
+            return FECHA_OTRA
+        formato = self._ids_formas_fecha[forma] = FECHA_TEXTO + len(self.formas_fecha)
+        self.formas_fecha.append(forma)
+        self.reconstruccion_fechas.append(_reconstruccion_fecha(forma))
+        return formato
+
+    # Añade los registros de un iterable y genera (log, posición en el almacén) de cada uno.
+    # El bucle trabaja con variables locales porque se ejecuta una vez por línea de log.
+    def agregar_registros(self, logs):
+        ids_severidades, ids_plantillas, ids_formas_fecha = self._ids_severidades, self._ids_plantillas, self._ids_formas_fecha
+        parametros, otros_valores, buscar = self.parametros, self.otros_valores, self.clasificador.buscar
+        agregar_severidad, agregar_plantilla, agregar_fin = self.id_severidad.append, self.id_plantilla.append, self.fin_parametros.append
+        agregar_regla, agregar_formato, agregar_fecha = self.reglas.append, self.formato_fecha.append, self.fechas.append
+        posicion = len(self.reglas)
+        for log in logs:
+            severity, message, timestamp = log
+
+            id_severidad = ids_severidades.get(severity)
+            if id_severidad is None:
+                id_severidad = self._internar_severidad(severity, posicion)
+            agregar_severidad(id_severidad)
+
+            if isinstance(message, str):
+                literales, variables = _separar_plantilla(message)
+                id_plantilla = ids_plantillas.get(literales)
+                if id_plantilla is None:
+                    id_plantilla = self._internar_plantilla(literales)
+                parametros += variables
+                agregar_regla(buscar(message))
+            else:
+                id_plantilla = SIN_PLANTILLA
+                otros_valores['message', posicion] = message
+                agregar_regla(buscar(str(message)))
+            agregar_plantilla(id_plantilla)
+            agregar_fin(len(parametros))
+
+            formato, valor = FECHA_OTRA, 0
+            if isinstance(timestamp, str):
+                if not timestamp:
+                    formato = FECHA_VACIA
+                elif timestamp.isascii():
+                    texto = timestamp.encode('ascii')
+                    forma = texto.translate(_FORMA_FECHA)
+                    formato = ids_formas_fecha.get(forma)
+                    if formato is None:
+                        formato = self._internar_forma_fecha(forma)
+                    if formato != FECHA_OTRA:
+                        digitos = texto.translate(None, _NO_DIGITOS)
+                        if digitos:
+                            valor = int(digitos)
+            elif type(timestamp) is datetime.datetime and timestamp.tzinfo is None:
+                formato = FECHA_DATETIME
+                valor = ((timestamp.toordinal() * 86400 + timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second) * 10**6
+                         + timestamp.microsecond)
+            if formato == FECHA_OTRA:
+                otros_valores['timestamp', posicion] = timestamp
+                valor = 0
+            agregar_formato(formato)
+            agregar_fecha(valor)
+
+            yield log, posicion
+            posicion += 1
+
+    def mensaje(self, posicion):
+        id_plantilla = self.id_plantilla[posicion]
+        if id_plantilla == SIN_PLANTILLA:
+            return self.otros_valores['message', posicion]
+        literales = self.plantillas[id_plantilla]
+        if len(literales) == 1:
+            return literales[0]
+        inicio = self.fin_parametros[posicion - 1] if posicion else 0
+        parametros = self.parametros[inicio:self.fin_parametros[posicion]].decode('utf-8', 'surrogatepass').split('\x00')
+        return self.formatos_plantillas[id_plantilla] % tuple(parametros)
+
+    def fecha(self, posicion):
+        formato = self.formato_fecha[posicion]
+        if formato >= FECHA_TEXTO:
+            potencia, formato_texto = self.reconstruccion_fechas[formato - FECHA_TEXTO]
+            return formato_texto % tuple(str(self.fechas[posicion] + potencia)[1:])
+        if formato == FECHA_VACIA:
+            return ''
+        if formato == FECHA_DATETIME:
+            microsegundos = self.fechas[posicion]
+            dias, microsegundos = divmod(microsegundos, 86400 * 10**6)
+            return datetime.datetime.fromordinal(dias) + datetime.timedelta(microseconds=microsegundos)
+        return self.otros_valores['timestamp', posicion]
+
+    def severidad(self, posicion):
+        id_severidad = self.id_severidad[posicion]
+        if id_severidad == SEVERIDAD_OTRA:
+            return self.otros_valores['severity', posicion]
+        return self.severidades[id_severidad]
+
+    def registro(self, posicion):
+        return RegistroLog(self.severidad(posicion), self.mensaje(posicion), self.fecha(posicion))
+
+    # Genera (log, explicacion) de los eventos de las posiciones dadas; la explicación se obtiene de
+    # la regla guardada, o del mensaje si no se reconoce
+    def recorrer(self, posiciones):
+        explicaciones = [explicacion for _, _, explicacion in self.clasificador.reglas]
+        for posicion in posiciones:
+            log = self.registro(posicion)
+            regla = self.reglas[posicion]
+            yield log, explicaciones[regla] if regla >= 0 else explicar_no_reconocido(log.message)
+
+# Vista de una categoría sobre uno o varios almacenes de eventos: lista de (almacén, posiciones).
+# Se comporta como la lista de (log, explicacion) del análisis original, pero solo guarda posiciones
+# y reconstruye los registros al recorrerla.
+class VistaEventos:
+    def __init__(self, segmentos):
+        self.segmentos = segmentos
+
+    def __len__(self):
+        return sum(len(posiciones) for _, posiciones in self.segmentos)
+
+    def __iter__(self):
+        for almacen, posiciones in self.segmentos:
+            yield from almacen.recorrer(posiciones)
+
+# Función para generar explicaciones detalladas y personalizadas para cada log
+def generar_explicacion(log):
+    return CLASIFICADOR.clasificar(str(log.message))[1]
+
+# Función para analizar los logs y categorizar los eventos. Cada categoría es una lista de
+# (log, explicacion). Con 'compacto' los eventos se guardan en un almacén compacto y cada categoría
+# es una vista con las posiciones de sus eventos: ocupa mucha menos memoria, pero separar cada
+# mensaje en plantilla y partes variables hace el análisis más lento, y el informe reconstruye
+# cada evento al recorrer la vista. Solo compensa cuando los resultados no caben en memoria.
+def analizar_logs(logs, clasificador=CLASIFICADOR, compacto=False):
+    if not compacto:
+        categorias = tuple([] for _ in range(len(SEVERIDADES_CATEGORIA) + 1))
+        indices = {severity: posicion for posicion, severity in enumerate(SEVERIDADES_CATEGORIA)}
+        otros = len(SEVERIDADES_CATEGORIA)
+        clasificar = clasificador.clasificar
+        for log in logs:
+            categorias[indices.get(log.severity, otros)].append((log, clasificar(str(log.message))[1]))
+        return categorias
+    almacen = AlmacenEventos(clasificador)
+    categorias = tuple(array('I') for _ in range(len(SEVERIDADES_CATEGORIA) + 1))
+    indices = {severity: posicion for posicion, severity in enumerate(SEVERIDADES_CATEGORIA)}
+    otros = len(SEVERIDADES_CATEGORIA)
+    for log, posicion in almacen.agregar_registros(logs):
+        categorias[indices.get(log.severity, otros)].append(posicion)
+    return tuple(VistaEventos([(almacen, posiciones)]) for posiciones in categorias)
+
+# Severidades con categoría propia, en el orden de las categorías devueltas por el análisis;
+# cualquier otra severidad va a la última categoría (otros eventos)
+SEVERIDADES_CATEGORIA = ['ERROR', 'WARNING', 'CRITICAL']
+
+# Número de filas que extrae de una vez una vista de DataFrame al recorrerse
+FILAS_POR_BLOQUE_VISTA = 10_000
+
+# Vista de una categoría sobre un DataFrame analizado. Se comporta como la lista de
+# (log, explicacion) del análisis fila a fila, pero solo guarda las posiciones de sus filas
+# y genera los registros y explicaciones al recorrerla, por bloques de filas.
+class VistaCategoria:
+    def __init__(self, df, posiciones, clasificador):
+        self._df = df
+        self._posiciones = posiciones
+        self._clasificador = clasificador
+
+    def __len__(self):
+        return len(self._posiciones)
+
+    # Filas de la categoría, en orden, en DataFrames de como máximo 'tamano' filas
+    def bloques(self, tamano=FILAS_POR_BLOQUE_VISTA):
+        for inicio in range(0, len(self._posiciones), tamano):
+            yield self._df.take(self._posiciones[inicio:inicio + tamano])
+
+    # Explicación de cada fila de un bloque: la de su regla o, si no se reconoce, la de su mensaje,
+    # calculada una vez por mensaje distinto
+    def explicaciones(self, filas):
+        import numpy as np
+        import pandas as pd
+        reglas = filas['Regla'].cat.codes.to_numpy()
+        explicaciones = np.array([explicacion for _, _, explicacion in self._clasificador.reglas] + [None], dtype=object)[reglas]
+        desconocidos = np.flatnonzero(reglas < 0)
+        if len(desconocidos):
+            codigos, mensajes = pd.factorize(filas['Message'].iloc[desconocidos], use_na_sentinel=False)
+            explicaciones[desconocidos] = np.array(
+                [self._clasificador.clasificar(str(message))[1] for message in mensajes], dtype=object
+            )[codigos]
+        return explicaciones
+
+    def __iter__(self):
+        for filas in self.bloques():
+            yield from zip(map(RegistroLog, filas['Severity'], filas['Message'], filas['Timestamp']), self.explicaciones(filas))
+
+# Función para clasificar los logs de un DataFrame con operaciones por columnas.
+# Cada mensaje distinto se clasifica una sola vez y el resultado se asigna a todas sus filas
+# como columna categórica 'Regla'; la columna 'Categoria' es la posición de su categoría.
+def clasificar_df(df, clasificador=CLASIFICADOR):
+    import numpy as np
+    import pandas as pd
+    codigos, mensajes = pd.factorize(df['Message'].astype(str))
+    posiciones = np.fromiter(map(clasificador.buscar, mensajes), dtype=np.int32, count=len(mensajes))
+    # factorize da el código -1 a los mensajes vacíos (NaN, None), que no coinciden con ninguna regla
+    # ("Evento no reconocido: nan" en el análisis fila a fila)
+    posiciones = np.where(codigos >= 0, np.append(posiciones, -1)[codigos], -1)
+    reglas = pd.Categorical.from_codes(posiciones, categories=[regla_id for regla_id, _, _ in clasificador.reglas])
+    categoria = pd.Index(SEVERIDADES_CATEGORIA).get_indexer(df['Severity'])
+    categoria[categoria < 0] = len(SEVERIDADES_CATEGORIA)
+    return df.assign(Regla=reglas, Categoria=categoria)
+
+# Vistas de las categorías de un DataFrame ya clasificado, a partir de un groupby sobre 'Categoria'
+def vistas_df(df, clasificador=CLASIFICADOR):
+    import numpy as np
+    grupos = df.groupby('Categoria').indices
+    vacio = np.empty(0, dtype=np.intp)
+    return tuple(
+        VistaCategoria(df, grupos.get(posicion, vacio), clasificador)
+        for posicion in range(len(SEVERIDADES_CATEGORIA) + 1)
+    )
+
+# Función para analizar los logs de un DataFrame con operaciones por columnas
+def analizar_logs_df(df, clasificador=CLASIFICADOR):
+    return vistas_df(clasificar_df(df, clasificador), clasificador)
+
+# Función para combinar resultados de múltiples archivos de logs. Las vistas sobre almacenes de
+# eventos se combinan uniendo sus segmentos, sin copiar los eventos.
+def combinar_resultados(resultados):
+    resultados = list(resultados)
+    if all(isinstance(eventos, VistaEventos) for resultado in resultados for eventos in resultado):
+        return tuple(
+            VistaEventos([segmento for resultado in resultados for segmento in resultado[posicion].segmentos])
+            for posicion in range(len(SEVERIDADES_CATEGORIA) + 1)
+        )
+    errores, advertencias, eventos_criticos, otros_eventos = [], [], [], []
+    
+    for resultado in resultados:
+        errores.extend(resultado[0])
+        advertencias.extend(resultado[1])
+        eventos_criticos.extend(resultado[2])
+        otros_eventos.extend(resultado[3])
+    
+    return errores, advertencias, eventos_criticos, otros_eventos
+
+# Ancho inicial (en minutos) de los intervalos de tiempo de los patrones temporales
+ANCHO_INTERVALO_MINUTOS = 1
+
+# Número máximo de intervalos distintos que guarda cada acumulador de patrones; al superarlo se
+# duplica el ancho de los intervalos, así que la memoria no depende del número de eventos
+MAX_INTERVALOS = 2048
+
+# Plantillas de mensaje distintas que conserva cada acumulador para los mensajes recurrentes
+CAPACIDAD_MENSAJES = 1000
+
+# Parámetros de la detección de ráfagas: ventana deslizante (en intervalos), veces por encima
+# de la media de la serie y número mínimo de eventos en la ventana
+VENTANA_RAFAGA = 5
+FACTOR_RAFAGA = 3.0
+MINIMO_RAFAGA = 10
+
+_REGLAS_POR_EXPLICACION = {explicacion: regla_id for regla_id, _, explicacion in REGLAS}
+
+_MESES_SYSLOG = {mes: numero for numero, mes in enumerate(_MESES, 1)}
+
+# Minuto (contado desde el 1 de enero del año 1) de los 16 primeros caracteres de una fecha en texto.
+# Las fechas de syslog no incluyen el año, que depende de cuándo se analizan: para ellas se devuelve
+# (mes, día, hora, minuto) y el año lo pone _minuto_syslog, fuera de la caché.
+@functools.lru_cache(maxsize=1 << 12)
+def _minuto_texto(prefijo):
+    try:
+        if prefijo[4:5] == '-':
+            fecha = datetime.datetime(int(prefijo[0:4]), int(prefijo[5:7]), int(prefijo[8:10]), int(prefijo[11:13]), int(prefijo[14:16]))
+        elif prefijo[:3] in _MESES_SYSLOG:
+            return _MESES_SYSLOG[prefijo[:3]], int(prefijo[4:6]), int(prefijo[7:9]), int(prefijo[10:12])
+        else:
+            fecha = datetime.datetime.fromisoformat(prefijo.strip())
+    except ValueError:
+        return None
+    return _minuto_fecha(fecha)
+
+# Minuto de una fecha de syslog (mes, día, hora, minuto). El año es el del momento del análisis, o el
+# anterior si la fecha sería posterior a ese momento: un log de diciembre analizado en enero es del
+# año pasado. No se usa la fecha de modificación del archivo porque no llega hasta aquí.
+def _minuto_syslog(partes):
+    ahora = datetime.datetime.now()
+    anio = ahora.year - (partes > (ahora.month, ahora.day, ahora.hour, ahora.minute))
+    try:
+        return _minuto_fecha(datetime.datetime(anio, *partes))
+    except ValueError:
+        return None
+
+def _minuto_fecha(fecha):
+    return fecha.toordinal() * 1440 + fecha.hour * 60 + fecha.minute
+
+# Minuto de un timestamp en texto (.log) o fecha (.xlsx, .csv, .parquet); None si no tiene fecha válida
+def minuto_evento(timestamp):
+    if isinstance(timestamp, str):
+        minuto = _minuto_texto(timestamp[:CARACTERES_MINUTO_FECHA]) if timestamp else None
+        return _minuto_syslog(minuto) if type(minuto) is tuple else minuto
+    if isinstance(timestamp, datetime.datetime):
+        try:
+            return _minuto_fecha(timestamp)
+        except ValueError:
+            return None
+    return None
+
+# Fecha de inicio de un minuto devuelto por minuto_evento
+def fecha_minuto(minuto):
+    return datetime.datetime.fromordinal(minuto // 1440) + datetime.timedelta(minutes=minuto % 1440)
+
+# Acumulador de patrones temporales de un conjunto de eventos, construido en una sola pasada:
+#  - conteos por intervalo de tiempo, severidad y regla ({intervalo: Counter((severity, regla_id))});
+#    si hay más de 'max_intervalos' intervalos distintos, se duplica su ancho y se funden de dos en dos
+#  - plantillas de mensaje más frecuentes ({(severity, plantilla): [cantidad, mensaje de ejemplo]}),
+#    con una poda a las 'capacidad_mensajes' más frecuentes cuando se dobla esa capacidad; los
+#    conteos son exactos mientras no se pode y, después, una cota inferior de los reales
+class PatronesTemporales:
+    def __init__(self, ancho_minutos=ANCHO_INTERVALO_MINUTOS, max_intervalos=MAX_INTERVALOS, capacidad_mensajes=CAPACIDAD_MENSAJES):
+        self.ancho_minutos = ancho_minutos
+        self.max_intervalos = max_intervalos
+        self.capacidad_mensajes = capacidad_mensajes
+        self.intervalos = {}
+        self.mensajes = {}
+        self.sin_fecha = 0
+        self.mensajes_podados = 0
+
+    def agregar(self, log, regla_id):
+        self.agregar_intervalo(minuto_evento(log.timestamp), log.severity, regla_id)
+        message = str(log.message)
+        self.agregar_mensaje(log.severity, normalizar_mensaje(message), message)
+
+    # Cuenta eventos de una severidad y regla en el intervalo de un minuto (None si no tienen fecha)
+    def agregar_intervalo(self, minuto, severity, regla_id, cantidad=1):
+        if minuto is None:
+            self.sin_fecha += cantidad
+            return
+        intervalo = minuto // self.ancho_minutos
+        conteo = self.intervalos.get(intervalo)
+        if conteo is None:
+            conteo = self.intervalos[intervalo] = Counter()
+            if len(self.intervalos) > self.max_intervalos:
+                self._ensanchar()
+                conteo = self.intervalos[minuto // self.ancho_minutos]
+        conteo[severity, regla_id] += cantidad
+
+    # Cuenta eventos de una severidad con una plantilla de mensaje; 'ejemplo' es un mensaje original
+    def agregar_mensaje(self, severity, plantilla, ejemplo, cantidad=1):
+        clave = (severity, plantilla)
+        mensaje = self.mensajes.get(clave)
+        if mensaje is None:
+            self.mensajes[clave] = [cantidad, ejemplo]
+            if len(self.mensajes) > 2 * self.capacidad_mensajes:
+                self._podar_mensajes()
+        else:
+            mensaje[0] += cantidad
+
+    # Ensancha los intervalos hasta el ancho que tendrán después de agregar eventos de los minutos
+    # dados (un array de numpy) y lo devuelve, para contar esos eventos ya agrupados por intervalo
+    def ensanchar_para(self, minutos):
+        import numpy as np
+        existentes = np.fromiter(self.intervalos, dtype=np.int64, count=len(self.intervalos))
+        nuevos = np.unique(minutos // self.ancho_minutos)
+        ancho = self.ancho_minutos
+        while len(np.union1d(existentes, nuevos)) > self.max_intervalos:
+            existentes, nuevos = np.unique(existentes // 2), np.unique(nuevos // 2)
+            ancho *= 2
+        self._ensanchar(ancho)
+        return ancho
+
+    # Duplica el ancho de los intervalos hasta que su número vuelva a estar dentro del límite
+    def _ensanchar(self, ancho_minutos=None):
+        while len(self.intervalos) > self.max_intervalos or (ancho_minutos and self.ancho_minutos < ancho_minutos):
+            intervalos = {}
+            for intervalo, conteo in self.intervalos.items():
+                destino = intervalos.get(intervalo // 2)
+                if destino is None:
+                    intervalos[intervalo // 2] = conteo
+                else:
+                    destino.update(conteo)
+            self.intervalos = intervalos
+            self.ancho_minutos *= 2
+
+    def _podar_mensajes(self):
+        conservados = sorted(self.mensajes.items(), key=lambda item: -item[1][0])[:self.capacidad_mensajes]
+        self.mensajes_podados += len(self.mensajes) - len(conservados)
+        self.mensajes = dict(conservados)
+
+    # Suma otro acumulador a este; ambos se llevan antes al mismo ancho de intervalo
+    def combinar(self, otro):
+        if otro.ancho_minutos > self.ancho_minutos:
+            self._ensanchar(otro.ancho_minutos)
+        factor = self.ancho_minutos // otro.ancho_minutos
+        for intervalo, conteo in otro.intervalos.items():
+            destino = self.intervalos.get(intervalo // factor)
+            if destino is None:
+                self.intervalos[intervalo // factor] = Counter(conteo)
+            else:
+                destino.update(conteo)
+        self._ensanchar()
+        for clave, (cantidad, ejemplo) in otro.mensajes.items():
+            mensaje = self.mensajes.get(clave)
+            if mensaje is None:
+                self.mensajes[clave] = [cantidad, ejemplo]
+            else:
+                mensaje[0] += cantidad
+        if len(self.mensajes) > 2 * self.capacidad_mensajes:
+            self._podar_mensajes()
+        self.sin_fecha += otro.sin_fecha
+        self.mensajes_podados += otro.mensajes_podados
+        return self
+
+    # Inicio del primer intervalo y fin del último con eventos con fecha; None si no hay ninguno
+    def rango(self):
+        if not self.intervalos:
+            return None
+        return fecha_minuto(min(self.intervalos) * self.ancho_minutos), fecha_minuto((max(self.intervalos) + 1) * self.ancho_minutos)
+
+    # Número de eventos con fecha por intervalo, de mayor a menor; 'severidades' filtra las severidades contadas
+    def intervalos_pico(self, cantidad=10, severidades=None):
+        totales = [
+            (intervalo, sum(n for (severity, _), n in conteo.items() if severidades is None or severity in severidades))
+            for intervalo, conteo in self.intervalos.items()
+        ]
+        totales = [(intervalo, total) for intervalo, total in totales if total]
+        totales.sort(key=lambda item: (-item[1], item[0]))
+        return [(fecha_minuto(intervalo * self.ancho_minutos), total) for intervalo, total in totales[:cantidad]]
+
+    # Ráfagas de cada serie (severity, regla_id): tramos donde la suma de una ventana deslizante de
+    # 'ventana' intervalos supera 'factor' veces la media de la serie por ventana (y al menos 'minimo'
+    # eventos). La media se calcula sobre los intervalos con actividad, para que los huecos sin logs
+    # no la rebajen. Devuelve diccionarios ordenados de mayor a menor intensidad.
+    def detectar_rafagas(self, ventana=VENTANA_RAFAGA, factor=FACTOR_RAFAGA, minimo=MINIMO_RAFAGA):
+        if not self.intervalos:
+            return []
+        series = {}
+        for intervalo in sorted(self.intervalos):
+            for clave, n in self.intervalos[intervalo].items():
+                series.setdefault(clave, []).append((intervalo, n))
+        activos = len(self.intervalos)
+        rafagas, umbrales = [], {}
+        for (severity, regla_id), puntos in series.items():
+            media = sum(n for _, n in puntos) / activos * min(ventana, activos)
+            umbral = umbrales[severity, regla_id] = max(minimo, factor * media)
+            suma, izquierda, actual = 0, 0, None
+            for intervalo, n in puntos:
+                suma += n
+                while puntos[izquierda][0] <= intervalo - ventana:
+                    suma -= puntos[izquierda][1]
+                    izquierda += 1
+                if suma < umbral:
+                    continue
+                inicio = puntos[izquierda][0]
+                if actual is not None and inicio <= actual['fin']:
+                    actual['fin'] = intervalo
+                    actual['maximo'] = max(actual['maximo'], suma)
+                else:
+                    actual = {'severity': severity, 'regla': regla_id, 'inicio': inicio, 'fin': intervalo, 'maximo': suma, 'media': media}
+                    rafagas.append(actual)
+        for rafaga in rafagas:
+            # La ventana que supera el umbral incluye intervalos anteriores al pico; la ráfaga se recorta
+            # a los intervalos que superan por sí solos la parte del umbral que les corresponde
+            serie = series[rafaga['severity'], rafaga['regla']]
+            picos = [intervalo for intervalo, n in serie if rafaga['inicio'] <= intervalo <= rafaga['fin'] and n * ventana >= umbrales[rafaga['severity'], rafaga['regla']]]
+            if picos:
+                rafaga['inicio'], rafaga['fin'] = picos[0], picos[-1]
+            rafaga['eventos'] = sum(n for intervalo, n in serie if rafaga['inicio'] <= intervalo <= rafaga['fin'])
+            rafaga['intensidad'] = rafaga['maximo'] / rafaga['media']
+            rafaga['inicio'] = fecha_minuto(rafaga['inicio'] * self.ancho_minutos)
+            rafaga['fin'] = fecha_minuto((rafaga['fin'] + 1) * self.ancho_minutos)
+        return sorted(rafagas, key=lambda rafaga: -rafaga['intensidad'])
+
+    # Plantillas de mensaje más frecuentes: lista de (severity, plantilla, cantidad, mensaje de ejemplo)
+    def mensajes_recurrentes(self, cantidad=10):
+        mensajes = sorted(self.mensajes.items(), key=lambda item: -item[1][0])[:cantidad]
+        return [(severity, plantilla, n, ejemplo) for (severity, plantilla), (n, ejemplo) in mensajes]
+
+# Resume los grupos de eventos dados por 'codigos' (un entero por evento, en orden de lectura) y sus
+# minutos (ver _minutos_columna). Devuelve, con un elemento por grupo en orden de primera aparición,
+# el código, la cantidad de eventos y los índices del primer evento leído y de los eventos más
+# temprano y más tardío como los elige GrupoEventos (en un empate, el primero y el último leídos; los
+# eventos sin fecha solo si el grupo no tiene ninguno con fecha).
+def _resumir_grupos(codigos, minutos, con_fecha):
+    import numpy as np
+    valores, primeros, inversos, cantidades = np.unique(codigos, return_index=True, return_inverse=True, return_counts=True)
+    inversos = inversos.reshape(-1)
+    inicios = np.cumsum(cantidades) - cantidades
+    limites = np.iinfo(np.int64)
+    # lexsort es estable: dentro de cada grupo y minuto, los eventos quedan en orden de lectura
+    tempranos = np.lexsort((np.where(con_fecha, minutos, limites.max), inversos))[inicios]
+    tardios = np.lexsort((np.where(con_fecha, minutos, limites.min), inversos))[inicios + cantidades - 1]
+    aparicion = np.argsort(primeros, kind='stable')
+    return valores[aparicion], cantidades[aparicion], primeros[aparicion], tempranos[aparicion], tardios[aparicion]
+
+# Minuto ordinal del 1 de enero de 1970, origen de los datetime64 de numpy
+_MINUTO_EPOCA = datetime.datetime(1970, 1, 1).toordinal() * 1440
+
+# Minuto (minuto_evento) de cada fecha de una columna de un DataFrame y máscara de las fechas válidas
+# (en las demás el minuto es 0). Las columnas de fechas se convierten con numpy (las fechas con zona
+# horaria, por su hora local, como minuto_evento); en el resto, minuto_evento se llama una vez por
+# cada valor distinto, y en las de texto solo con sus CARACTERES_MINUTO_FECHA primeros caracteres.
+def _minutos_columna(fechas):
+    import numpy as np
+    import pandas as pd
+    if isinstance(fechas.dtype, pd.DatetimeTZDtype):
+        fechas = fechas.dt.tz_localize(None)
+    if pd.api.types.is_datetime64_dtype(fechas.dtype):
+        valores = fechas.to_numpy()
+        con_fecha = ~np.isnat(valores)
+        minutos = np.where(con_fecha, valores.astype('datetime64[m]').astype(np.int64) + _MINUTO_EPOCA, 0)
+        return minutos, con_fecha
+    if pd.api.types.is_string_dtype(fechas) and len(fechas):
+        fechas = fechas.str.slice(0, CARACTERES_MINUTO_FECHA)
+    codigos, valores = pd.factorize(fechas)
+    valores = [minuto_evento(valor) for valor in valores] + [None]
+    minutos = np.array([valor or 0 for valor in valores], dtype=np.int64)[codigos]
+    con_fecha = np.array([valor is not None for valor in valores], dtype=bool)[codigos]
+    return minutos, con_fecha
+
+# Plantilla (normalizar_mensaje) de cada mensaje de una columna de un DataFrame, como índice en la
+# lista de plantillas que se devuelve junto a los índices; cada mensaje distinto se normaliza una vez
+def _plantillas_columna(mensajes):
+    import pandas as pd
+    codigos, valores = pd.factorize(mensajes, use_na_sentinel=False)
+    plantillas, textos = pd.factorize(pd.Series([normalizar_mensaje(str(valor)) for valor in valores], dtype=object))
+    return plantillas[codigos], list(textos)
+
+# Acumula los patrones de una vista sobre un DataFrame con operaciones por columnas: los intervalos
+# se cuentan con un groupby por minuto, severidad y regla, y los mensajes por severidad y plantilla
+def _acumular_patrones_df(patrones, vista):
+    import numpy as np
+    import pandas as pd
+    if not len(vista):
+        return
+    filas = vista._df.take(vista._posiciones)
+    reglas_ids = [regla_id for regla_id, _, _ in vista._clasificador.reglas] + [None]
+    minutos, con_fecha = _minutos_columna(filas['Timestamp'])
+    severidades, valores_severidad = pd.factorize(filas['Severity'], use_na_sentinel=False)
+    valores_severidad = valores_severidad.tolist()
+    reglas = filas['Regla'].cat.codes.to_numpy()
+    # Los minutos se llevan al principio de su intervalo, con el ancho final de los patrones
+    ancho = patrones.ensanchar_para(minutos[con_fecha])
+    conteos = pd.DataFrame({
+        'minuto': minutos[con_fecha] // ancho * ancho, 'severidad': severidades[con_fecha], 'regla': reglas[con_fecha]
+    }).value_counts(sort=False)
+    for (minuto, severidad, regla), cantidad in zip(conteos.index.tolist(), conteos.tolist()):
+        patrones.agregar_intervalo(minuto, valores_severidad[severidad], reglas_ids[regla], cantidad)
+    patrones.sin_fecha += int(np.count_nonzero(~con_fecha))
+
+    plantillas, textos = _plantillas_columna(filas['Message'])
+    codigos, primeros, cantidades = np.unique(
+        plantillas.astype(np.int64) * len(valores_severidad) + severidades, return_index=True, return_counts=True
+    )
+    mensajes = filas['Message']
+    for indice in np.argsort(primeros, kind='stable').tolist():
+        plantilla, severidad = divmod(int(codigos[indice]), len(valores_severidad))
+        patrones.agregar_mensaje(valores_severidad[severidad], textos[plantilla], str(mensajes.iat[primeros[indice]]), int(cantidades[indice]))
+
+# Patrones temporales de una categoría de eventos, sea una lista, una vista o una categoría parcial
+def patrones_temporales(eventos):
+    if isinstance(eventos, CategoriaParcial):
+        return eventos.patrones
+    patrones = PatronesTemporales()
+    if isinstance(eventos, VistaCategoria):
+        _acumular_patrones_df(patrones, eventos)
+        return patrones
+    for log, explicacion in eventos:
+        patrones.agregar(log, _REGLAS_POR_EXPLICACION.get(explicacion))
+    return patrones
+
+# Patrones temporales de todos los eventos de un análisis (las cuatro categorías), en un resultado nuevo
+def combinar_patrones(errores, advertencias, eventos_criticos, otros_eventos):
+    combinado = PatronesTemporales()
+    for eventos in (errores, advertencias, eventos_criticos, otros_eventos):
+        combinado.combinar(patrones_temporales(eventos))
+    return combinado
+
+# Límite de eventos de ejemplo que conserva cada categoría en el análisis en paralelo
+LIMITE_MUESTRAS = 1000
+
+# Tamaño aproximado (en bytes) de los fragmentos en que se divide un .log grande para repartirlo entre procesos
+TAMANO_FRAGMENTO = 32 << 20
+
+# Grupo de eventos del mismo tipo (misma regla, o misma plantilla de mensaje si no se reconoce):
+# mensaje de ejemplo (el del primer evento leído), número de ocurrencias y hora del primer y del
+# último evento según su fecha. Las fechas se comparan por minuto (minuto_evento); si hay empate,
+# el primero es el primero leído y el último, el último leído. Los eventos sin fecha válida solo
+# cuentan como primero o último si el grupo no tiene ninguno con fecha.
+class GrupoEventos:
+    __slots__ = ('mensaje', 'explicacion', 'cantidad', 'primero', 'ultimo', 'minuto_primero', 'minuto_ultimo')
+
+    def __init__(self, mensaje, explicacion, timestamp, minuto=None):
+        self.mensaje = mensaje
+        self.explicacion = explicacion
+        self.cantidad = 1
+        self.primero = self.ultimo = timestamp
+        self.minuto_primero = self.minuto_ultimo = minuto
+
+    # Actualiza el primer y el último evento con los de eventos leídos después de los del grupo
+    def _extremos(self, primero, minuto_primero, ultimo, minuto_ultimo):
+        if minuto_primero is not None and (self.minuto_primero is None or minuto_primero < self.minuto_primero):
+            self.primero, self.minuto_primero = primero, minuto_primero
+        if self.minuto_ultimo is None or (minuto_ultimo is not None and minuto_ultimo >= self.minuto_ultimo):
+            self.ultimo, self.minuto_ultimo = ultimo, minuto_ultimo
+
+    # Cuenta un evento leído después de los del grupo
+    def agregar(self, timestamp, minuto):
+        self.cantidad += 1
+        self._extremos(timestamp, minuto, timestamp, minuto)
+
+    # Suma un grupo del mismo tipo leído después
+    def combinar(self, otro):
+        self.cantidad += otro.cantidad
+        self._extremos(otro.primero, otro.minuto_primero, otro.ultimo, otro.minuto_ultimo)
+        return self
+
+# Número máximo de grupos de mensajes no reconocidos (por plantilla) que guarda cada categoría parcial;
+# los mensajes de plantillas nuevas por encima del límite se cuentan en un único grupo de desbordamiento
+LIMITE_GRUPOS_NO_RECONOCIDOS = 1000
+
+# Clave del grupo de desbordamiento de los mensajes no reconocidos
+_CLAVE_DESBORDAMIENTO = (None, None)
+
+# Explicación del grupo de mensajes no reconocidos con la clave indicada
+def _explicacion_no_reconocido(clave):
+    if clave == _CLAVE_DESBORDAMIENTO:
+        return (
+            f"Otros eventos no reconocidos: los mensajes superan los {LIMITE_GRUPOS_NO_RECONOCIDOS} tipos distintos que se "
+            "agrupan por separado. Es necesario revisar los logs originales para identificar su causa."
+        )
+    return explicar_no_reconocido(clave[1])
+
+# Eventos de una categoría en forma compacta: total, grupos, patrones temporales y una muestra acotada
+# de (log, explicacion). Los eventos reconocidos se agrupan por explicación (una por regla) y los no
+# reconocidos por la plantilla de su mensaje (clave (None, plantilla)), con un máximo de
+# LIMITE_GRUPOS_NO_RECONOCIDOS grupos más uno de desbordamiento, así que el tamaño no depende del
+# número de mensajes distintos. Al recorrerla se obtienen solo las muestras; el total está en 'total'.
+# agrupar_eventos usa la misma agrupación con cualquier resultado, para que el informe y el JSON no
+# dependan del modo de ejecución.
+class CategoriaParcial:
+    def __init__(self, limite_muestras=LIMITE_MUESTRAS):
+        self.total = 0
+        self.grupos = {}
+        self.grupos_no_reconocidos = 0
+        self.muestras = []
+        self.limite_muestras = limite_muestras
+        self.patrones = PatronesTemporales()
+
+    # Clave del grupo de un mensaje no reconocido con la plantilla indicada
+    def _clave_no_reconocido(self, plantilla):
+        clave = (None, plantilla)
+        if clave in self.grupos or self.grupos_no_reconocidos < LIMITE_GRUPOS_NO_RECONOCIDOS:
+            return clave
+        return _CLAVE_DESBORDAMIENTO
+
+    def _nuevo_grupo(self, clave, grupo):
+        self.grupos[clave] = grupo
+        if isinstance(clave, tuple) and clave != _CLAVE_DESBORDAMIENTO:
+            self.grupos_no_reconocidos += 1
+
+    # Cuenta un evento en su grupo; 'plantilla' es la de su mensaje si ya se ha calculado
+    def agrupar(self, log, explicacion, minuto, plantilla=None):
+        if explicacion in _REGLAS_POR_EXPLICACION:
+            clave = explicacion
+        else:
+            clave = self._clave_no_reconocido(normalizar_mensaje(str(log.message)) if plantilla is None else plantilla)
+        grupo = self.grupos.get(clave)
+        if grupo is None:
+            explicacion_grupo = clave if isinstance(clave, str) else _explicacion_no_reconocido(clave)
+            self._nuevo_grupo(clave, GrupoEventos(log.message, explicacion_grupo, log.timestamp, minuto))
+        else:
+            grupo.agregar(log.timestamp, minuto)
+
+    def agregar(self, log, explicacion):
+        self.total += 1
+        minuto = minuto_evento(log.timestamp)
+        message = str(log.message)
+        plantilla = normalizar_mensaje(message)
+        self.agrupar(log, explicacion, minuto, plantilla)
+        self.patrones.agregar_intervalo(minuto, log.severity, _REGLAS_POR_EXPLICACION.get(explicacion))
+        self.patrones.agregar_mensaje(log.severity, plantilla, message)
+        if len(self.muestras) < self.limite_muestras:
+            self.muestras.append((log, explicacion))
+
+    # Suma otra categoría parcial a esta. Mientras no se alcanza el límite de grupos no reconocidos la
+    # operación es asociativa, así que los resultados de los fragmentos pueden combinarse en cualquier
+    # agrupación respetando su orden; por encima del límite solo varía el reparto con el desbordamiento.
+    def combinar(self, otra):
+        self.total += otra.total
+        for clave, grupo in otra.grupos.items():
+            self.sumar_grupo(clave, grupo)
+        self.muestras.extend(otra.muestras[:max(self.limite_muestras - len(self.muestras), 0)])
+        self.patrones.combinar(otra.patrones)
+        return self
+
+    # Suma un grupo de eventos leídos después de los de esta categoría, sin contarlos en 'total'.
+    # El grupo no se modifica: si no hay uno con su clave, se guarda una copia.
+    def sumar_grupo(self, clave, grupo):
+        if isinstance(clave, tuple) and clave != _CLAVE_DESBORDAMIENTO:
+            clave = self._clave_no_reconocido(clave[1])
+        if clave in self.grupos:
+            self.grupos[clave].combinar(grupo)
+        else:
+            grupo = copy.copy(grupo)
+            if clave == _CLAVE_DESBORDAMIENTO:
+                grupo.explicacion = _explicacion_no_reconocido(clave)
+            self._nuevo_grupo(clave, grupo)
+
+    def __iter__(self):
+        return iter(self.muestras)
+
+# Suma a 'agrupados' los grupos de un bloque de eventos, en orden de primera aparición. 'codigos' da
+# el grupo de cada evento: la posición de su regla en 'reglas' o, si no se reconoce, el número de
+# reglas más la posición de la plantilla de su mensaje en 'textos'. 'mensaje' y 'fecha' devuelven el
+# mensaje y la fecha del evento de un índice; solo se llaman para los eventos que representan a cada grupo.
+def _sumar_grupos(agrupados, reglas, textos, codigos, minutos, con_fecha, mensaje, fecha):
+    import numpy as np
+    resumen = [columna.tolist() for columna in _resumir_grupos(codigos, minutos, con_fecha)]
+    minutos = np.where(con_fecha, minutos, -1).tolist()
+    for codigo, cantidad, primero, temprano, tardio in zip(*resumen):
+        if codigo < len(reglas):
+            clave = explicacion = reglas[codigo][2]
+        else:
+            clave = (None, textos[codigo - len(reglas)])
+            explicacion = _explicacion_no_reconocido(clave)
+        grupo = GrupoEventos(mensaje(primero), explicacion, fecha(temprano), minutos[temprano] if minutos[temprano] >= 0 else None)
+        grupo.cantidad = cantidad
+        grupo.ultimo = fecha(tardio)
+        grupo.minuto_ultimo = minutos[tardio] if minutos[tardio] >= 0 else None
+        agrupados.sumar_grupo(clave, grupo)
+
+# Agrupa una vista sobre un DataFrame como agrupar_eventos, con operaciones por columnas: la plantilla
+# se calcula una vez por mensaje no reconocido distinto y el minuto una vez por minuto distinto
+def _agrupar_vista_df(vista):
+    import numpy as np
+    agrupados = CategoriaParcial(0)
+    if not len(vista):
+        return agrupados.grupos
+    filas = vista._df.take(vista._posiciones)
+    reglas = vista._clasificador.reglas
+    codigos = filas['Regla'].cat.codes.to_numpy().astype(np.int64)
+    desconocidos = np.flatnonzero(codigos < 0)
+    plantillas, textos = _plantillas_columna(filas['Message'].iloc[desconocidos])
+    codigos[desconocidos] = len(reglas) + plantillas
+    minutos, con_fecha = _minutos_columna(filas['Timestamp'])
+    mensajes, fechas = filas['Message'], filas['Timestamp']
+    _sumar_grupos(agrupados, reglas, textos, codigos, minutos, con_fecha, mensajes.iat.__getitem__, fechas.iat.__getitem__)
+    return agrupados.grupos
+
+# Agrupa los eventos de una categoría como CategoriaParcial (por regla, o por plantilla de mensaje si
+# no se reconocen); devuelve los grupos de más a menos frecuentes
+def agrupar_eventos(eventos):
+    if isinstance(eventos, CategoriaParcial):
+        grupos = eventos.grupos
+    elif isinstance(eventos, VistaCategoria):
+        grupos = _agrupar_vista_df(eventos)
+    else:
+        agrupados = CategoriaParcial(0)
+        for log, explicacion in eventos:
+            agrupados.agrupar(log, explicacion, minuto_evento(log.timestamp))
+        grupos = agrupados.grupos
+    return sorted(grupos.values(), key=lambda grupo: -grupo.cantidad)
+
+# Número de eventos de una categoría, sea una lista, una vista o una categoría parcial
+def contar_eventos(eventos):
+    return eventos.total if isinstance(eventos, CategoriaParcial) else len(eventos)
+
+# Suma a 'aciertos' los eventos de cada regla a partir de sus posiciones en la tabla de reglas (-1 si no se reconoce)
+def _sumar_aciertos(aciertos, reglas, posiciones_reglas):
+    import numpy as np
+    cantidades = np.bincount(posiciones_reglas.astype(np.int64) + 1, minlength=len(reglas) + 1).tolist()
+    aciertos[None] += cantidades[0]
+    for (regla_id, _, _), cantidad in zip(reglas, cantidades[1:]):
+        aciertos[regla_id] += cantidad
+
+# Aciertos por regla de un resultado (las cuatro categorías), en el orden de prioridad de las reglas
+# y con los eventos no reconocidos bajo la clave None. Se obtienen de la regla guardada con cada
+# evento, o de su explicación, sin volver a clasificar los mensajes.
+def aciertos_reglas(resultado, clasificador=CLASIFICADOR):
+    aciertos = Counter({regla_id: 0 for regla_id, _, _ in clasificador.reglas})
+    aciertos[None] = 0
+    por_explicacion = {explicacion: regla_id for regla_id, _, explicacion in clasificador.reglas}
+    for eventos in resultado:
+        if isinstance(eventos, VistaCategoria):
+            reglas = eventos._df['Regla'].cat.codes.to_numpy()[eventos._posiciones]
+            _sumar_aciertos(aciertos, eventos._clasificador.reglas, reglas)
+        elif isinstance(eventos, CategoriaParcial):
+            for explicacion, grupo in eventos.grupos.items():
+                aciertos[por_explicacion.get(explicacion)] += grupo.cantidad
+        else:
+            for _, explicacion in eventos:
+                aciertos[por_explicacion.get(explicacion)] += 1
+    return aciertos
+
+# Función para analizar los logs acumulando resultados parciales compactos en lugar de listas completas.
+# Si se pasan 'categorias', los eventos se añaden a ese resultado parcial en lugar de a uno nuevo.
+def analizar_logs_parcial(logs, limite_muestras=LIMITE_MUESTRAS, categorias=None):
+    if categorias is None:
+        categorias = tuple(CategoriaParcial(limite_muestras) for _ in range(len(SEVERIDADES_CATEGORIA) + 1))
+    indices = {severity: posicion for posicion, severity in enumerate(SEVERIDADES_CATEGORIA)}
+    otros = len(SEVERIDADES_CATEGORIA)
+    for log in logs:
+        categorias[indices.get(log.severity, otros)].agregar(log, generar_explicacion(log))
+    return categorias
+
+# Función para combinar resultados parciales de varios archivos o fragmentos, en orden.
+# Devuelve un resultado nuevo sin modificar los recibidos, que pueden estar guardados en la caché.
+def combinar_parciales(resultados, limite_muestras=LIMITE_MUESTRAS):
+    combinado = analizar_logs_parcial([], limite_muestras)
+    for resultado in resultados:
+        for categoria, otra in zip(combinado, resultado):
+            categoria.combinar(otra)
+    return combinado
+
+# Divide el contenido de un archivo en fragmentos de líneas completas; solo los .log se dividen.
+# 'datos' es el contenido en bytes o la ruta de un archivo en disco; en ese caso los fragmentos son
+# (ruta, inicio, fin) y cada proceso lee el suyo, sin que el contenido pase por el proceso principal.
+def dividir_archivo(nombre, datos, tamano_fragmento=TAMANO_FRAGMENTO):
+    if isinstance(datos, str):
+        yield from _dividir_en_disco(nombre, datos, tamano_fragmento)
+        return
+    if extension_logs(nombre) != '.log' or len(datos) <= tamano_fragmento:
+        yield nombre, datos
+        return
+    inicio = 0
+    while inicio < len(datos):
+        fin = datos.find(b'\n', inicio + tamano_fragmento)
+        fin = len(datos) if fin < 0 else fin + 1
+        yield nombre, datos[inicio:fin]
+        inicio = fin
+
+# Divide un archivo en disco como dividir_archivo, buscando el final de cada fragmento sin leer el resto
+def _dividir_en_disco(nombre, ruta, tamano_fragmento):
+    tamano = os.path.getsize(ruta)
+    if extension_logs(nombre) != '.log' or tamano <= tamano_fragmento:
+        yield nombre, (ruta, 0, tamano)
+        return
+    with open(ruta, 'rb') as archivo:
+        inicio = 0
+        while inicio < tamano:
+            archivo.seek(inicio + tamano_fragmento)
+            archivo.readline()
+            fin = min(archivo.tell(), tamano)
+            yield nombre, (ruta, inicio, fin)
+            inicio = fin
+
+# Analiza un archivo o fragmento dentro de un proceso de trabajo; 'datos' son bytes o (ruta, inicio, fin).
+# Devuelve el resultado parcial y los errores de lectura, que se reportan en el proceso principal.
+def _analizar_fragmento(nombre, datos, limite_muestras):
+    errores = []
+    establecer_manejador_errores(errores.append)
+    if isinstance(datos, tuple):
+        ruta, inicio, fin = datos
+        with open(ruta, 'rb') as archivo:
+            archivo.seek(inicio)
+            datos = archivo.read(fin - inicio)
+    archivo = BytesIO(datos)
+    archivo.name = nombre
+    return analizar_logs_parcial(leer_logs(archivo), limite_muestras), errores
+
+# Función para analizar varios archivos en paralelo con un grupo de procesos; devuelve un resultado
+# parcial por archivo. 'archivos' es una secuencia de (nombre, contenido en bytes o ruta en disco). Se mantienen
+# como máximo dos fragmentos pendientes por proceso y los fragmentos se combinan en orden. Los errores
+# de lectura de los procesos se reportan con reportar_error; si se pasa el conjunto 'con_errores', se
+# le añaden las posiciones de los archivos en los que hubo alguno.
+def analizar_archivos_en_paralelo(
+    archivos, procesos=None, limite_muestras=LIMITE_MUESTRAS, tamano_fragmento=TAMANO_FRAGMENTO, con_errores=None
+):
+    procesos = procesos or os.cpu_count() or 1
+    resultados = [analizar_logs_parcial([], limite_muestras) for _ in archivos]
+    fragmentos = (
+        (posicion, fragmento)
+        for posicion, (nombre, datos) in enumerate(archivos)
+        for fragmento in dividir_archivo(nombre, datos, tamano_fragmento)
+    )
+
+    def combinar_siguiente():
+        posicion, futuro = pendientes.popleft()
+        resultado, errores = futuro.result()
+        for mensaje in errores:
+            reportar_error(mensaje)
+        if errores and con_errores is not None:
+            con_errores.add(posicion)
+        for categoria, otra in zip(resultados[posicion], resultado):
+            categoria.combinar(otra)
+
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        pendientes = deque()
+        for posicion, (nombre, datos) in fragmentos:
+            pendientes.append((posicion, ejecutor.submit(_analizar_fragmento, nombre, datos, limite_muestras)))
+            if len(pendientes) >= 2 * procesos:
+                combinar_siguiente()
+        while pendientes:
+            combinar_siguiente()
+    return resultados
+
+# Función para analizar varios archivos en paralelo y combinar sus resultados en uno solo
+def analizar_en_paralelo(archivos, procesos=None, limite_muestras=LIMITE_MUESTRAS, tamano_fragmento=TAMANO_FRAGMENTO):
+    return combinar_parciales(
+        analizar_archivos_en_paralelo(archivos, procesos, limite_muestras, tamano_fragmento), limite_muestras
+    )
+
+# Función para generar un resumen estadístico de los logs
+def generar_resumen(errores, advertencias, eventos_criticos, otros_eventos):
+    return {
+        'Total de logs': sum(contar_eventos(eventos) for eventos in (errores, advertencias, eventos_criticos, otros_eventos)),
+        'Errores': contar_eventos(errores),
+        'Advertencias': contar_eventos(advertencias),
+        'Eventos críticos': contar_eventos(eventos_criticos),
+        'Otros eventos': contar_eventos(otros_eventos),
+        'Fecha del resumen': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+# Función para generar el detalle de todos los eventos en formato CSV
+def generar_detalle_csv(errores, advertencias, eventos_criticos, otros_eventos):
+    buffer = BytesIO()
+    # La marca BOM se escribe aparte: con 'utf-8-sig', TextIOWrapper reinicia el codificador en cada
+    # escritura (una por fila), mientras que 'utf-8' tiene una ruta rápida
+    buffer.write(codecs.BOM_UTF8)
+    texto = io.TextIOWrapper(buffer, encoding='utf-8', newline='')
+    escritor = csv.writer(texto)
+    escritor.writerow(['Categoría', 'Severity', 'Message', 'Timestamp', 'Explicación'])
+    categorias = [('Errores', errores), ('Advertencias', advertencias), ('Eventos críticos', eventos_criticos), ('Otros eventos', otros_eventos)]
+    for categoria, eventos in categorias:
+        if isinstance(eventos, VistaCategoria):
+            # Las vistas sobre un DataFrame se escriben por bloques, columna a columna
+            for filas in eventos.bloques():
+                bloque = io.StringIO()
+                csv.writer(bloque).writerows(zip(
+                    itertools.repeat(categoria), filas['Severity'].tolist(), filas['Message'].tolist(),
+                    filas['Timestamp'].tolist(), eventos.explicaciones(filas)
+                ))
+                texto.write(bloque.getvalue())
+            continue
+        for log, explicacion in eventos:
+            escritor.writerow([categoria, log.severity, log.message, log.timestamp, explicacion])
+    texto.flush()
+    texto.detach()
+    buffer.seek(0)
+    return buffer
+
+# Patrón de los archivos analizados en modo incremental; incluye los rotados (app.log.1), salvo los .gz
+PATRON_INCREMENTAL = '*.log*'
+
+# Directorio por defecto de los puntos de control del modo incremental, fuera de los directorios analizados
+DIRECTORIO_ESTADO_INCREMENTAL = os.path.join(os.path.expanduser('~'), '.cache', 'auditoria_logs', 'incremental')
+
+# Bytes del inicio de cada archivo que se guardan para detectar que un inodo se ha reutilizado
+BYTES_HUELLA_INICIO = 1024
+
+_TERMINADORES_LINEA = '\n\r\x0b\x0c\x1c\x1d\x1e\x85'
+
+# Estado de un archivo en el análisis incremental. El archivo se identifica por su inodo, así que
+# sigue reconociéndose después de que la rotación lo renombre (app.log -> app.log.1).
+class PuntoControl:
+    def __init__(self, inodo):
+        self.inodo = inodo
+        self.desplazamiento = 0
+        self.pendiente = ''
+        self.huella_inicio = b''
+        self.formatos = None
+        self.resultado = analizar_logs_parcial([])
+
+# Conversión de los puntos de control a tipos JSON y de vuelta. El estado se guarda como JSON, que no
+# ejecuta código al leerse. En el modo incremental solo se leen archivos .log, así que severidades,
+# mensajes y fechas son texto.
+def _patrones_a_json(patrones):
+    return {
+        'ancho_minutos': patrones.ancho_minutos,
+        'max_intervalos': patrones.max_intervalos,
+        'capacidad_mensajes': patrones.capacidad_mensajes,
+        'sin_fecha': patrones.sin_fecha,
+        'mensajes_podados': patrones.mensajes_podados,
+        'intervalos': [
+            [intervalo, [[severity, regla_id, cantidad] for (severity, regla_id), cantidad in conteo.items()]]
+            for intervalo, conteo in patrones.intervalos.items()
+        ],
+        'mensajes': [[severity, plantilla, cantidad, ejemplo] for (severity, plantilla), (cantidad, ejemplo) in patrones.mensajes.items()],
+    }
+
+def _patrones_desde_json(datos):
+    patrones = PatronesTemporales(datos['ancho_minutos'], datos['max_intervalos'], datos['capacidad_mensajes'])
+    patrones.sin_fecha = datos['sin_fecha']
+    patrones.mensajes_podados = datos['mensajes_podados']
+    patrones.intervalos = {
+        intervalo: Counter({(severity, regla_id): cantidad for severity, regla_id, cantidad in conteo})
+        for intervalo, conteo in datos['intervalos']
+    }
+    patrones.mensajes = {(severity, plantilla): [cantidad, ejemplo] for severity, plantilla, cantidad, ejemplo in datos['mensajes']}
+    return patrones
+
+def _categoria_a_json(categoria):
+    return {
+        'total': categoria.total,
+        'limite_muestras': categoria.limite_muestras,
+        'grupos': [
+            [
+                list(clave) if isinstance(clave, tuple) else clave, grupo.mensaje, grupo.explicacion, grupo.cantidad,
+                grupo.primero, grupo.ultimo, grupo.minuto_primero, grupo.minuto_ultimo
+            ]
+            for clave, grupo in categoria.grupos.items()
+        ],
+        'muestras': [[log.severity, log.message, log.timestamp, explicacion] for log, explicacion in categoria.muestras],
+        'patrones': _patrones_a_json(categoria.patrones),
+    }
+
+def _categoria_desde_json(datos):
+    categoria = CategoriaParcial(datos['limite_muestras'])
+    categoria.total = datos['total']
+    for clave, mensaje, explicacion, cantidad, primero, ultimo, minuto_primero, minuto_ultimo in datos['grupos']:
+        grupo = GrupoEventos(mensaje, explicacion, primero, minuto_primero)
+        grupo.cantidad = cantidad
+        grupo.ultimo, grupo.minuto_ultimo = ultimo, minuto_ultimo
+        categoria._nuevo_grupo(tuple(clave) if isinstance(clave, list) else clave, grupo)
+    categoria.muestras = [(RegistroLog(severity, message, timestamp), explicacion) for severity, message, timestamp, explicacion in datos['muestras']]
+    categoria.patrones = _patrones_desde_json(datos['patrones'])
+    return categoria
+
+def _punto_a_json(punto):
+    return {
+        'inodo': list(punto.inodo),
+        'desplazamiento': punto.desplazamiento,
+        'pendiente': punto.pendiente,
+        'huella_inicio': punto.huella_inicio.decode('latin-1'),
+        'formatos': punto.formatos,
+        'resultado': [_categoria_a_json(categoria) for categoria in punto.resultado],
+    }
+
+def _punto_desde_json(datos):
+    punto = PuntoControl(tuple(datos['inodo']))
+    punto.desplazamiento = datos['desplazamiento']
+    punto.pendiente = datos['pendiente']
+    punto.huella_inicio = datos['huella_inicio'].encode('latin-1')
+    punto.formatos = datos['formatos']
+    if punto.formatos is not None and not set(punto.formatos) <= FORMATOS_LOG.keys():
+        raise ValueError(f"formatos desconocidos: {punto.formatos}")
+    punto.resultado = tuple(_categoria_desde_json(categoria) for categoria in datos['resultado'])
+    return punto
+
+# Ruta por defecto del estado del modo incremental de un directorio y patrón: un archivo por
+# directorio analizado dentro de 'directorio_estado', con nombre derivado de su ruta absoluta
+def ruta_estado_incremental(directorio, patron=PATRON_INCREMENTAL, directorio_estado=None):
+    clave = hashlib.sha256(f"{os.path.abspath(directorio)}\0{patron}".encode('utf-8', 'surrogateescape')).hexdigest()[:32]
+    return os.path.join(directorio_estado or DIRECTORIO_ESTADO_INCREMENTAL, f'{clave}.json')
+
+# Lee los puntos de control guardados ({inodo: PuntoControl}); un estado ilegible o de otra versión
+# de las reglas se descarta (informando del error si no se puede leer) y el análisis empieza de cero
+def _leer_estado_incremental(ruta_estado):
+    if not os.path.exists(ruta_estado):
+        return {}
+    try:
+        with open(ruta_estado, encoding='utf-8') as archivo:
+            estado = json.load(archivo)
+        if estado.get('version') != VERSION_REGLAS:
+            return {}
+        puntos = [_punto_desde_json(datos) for datos in estado['archivos']]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        reportar_error(f"No se pudo leer el estado del análisis incremental ({ruta_estado}): {e}. Se analiza desde el principio.")
+        return {}
+    return {punto.inodo: punto for punto in puntos}
+
+# Guarda los puntos de control de forma atómica; los errores se informan y no interrumpen el análisis
+def _guardar_estado_incremental(ruta_estado, puntos):
+    temporal = ruta_estado + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(ruta_estado)), exist_ok=True)
+        contenido = json.dumps({'version': VERSION_REGLAS, 'archivos': [_punto_a_json(punto) for punto in puntos.values()]}, ensure_ascii=False)
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta_estado)
+    except OSError as e:
+        reportar_error(f"No se pudo guardar el estado del análisis incremental ({ruta_estado}): {e}")
+
+# Separa las líneas completas de un texto y devuelve (líneas, resto sin terminar). Una línea final
+# terminada en '\r' se considera incompleta porque el '\n' puede llegar en la siguiente lectura.
+def _separar_lineas(texto):
+    lineas = texto.splitlines(True)
+    resto = ''
+    if lineas and (lineas[-1][-1] not in _TERMINADORES_LINEA or lineas[-1].endswith('\r')):
+        resto = lineas.pop()
+    return [linea[:-2] if linea.endswith('\r\n') else linea[:-1] for linea in lineas], resto
+
+# Lee y analiza los bytes añadidos a un archivo desde su punto de control. Si el archivo es más corto
+# que lo ya leído (truncado) o su inicio ha cambiado (inodo reutilizado), se analiza desde el principio.
+# Devuelve el punto de control actualizado y los bytes leídos.
+def _avanzar_archivo(punto, archivo, tamano, tamano_bloque=TAMANO_BLOQUE):
+    inicio = archivo.read(BYTES_HUELLA_INICIO)
+    if tamano < punto.desplazamiento or inicio[:len(punto.huella_inicio)] != punto.huella_inicio:
+        punto = PuntoControl(punto.inodo)
+    punto.huella_inicio = inicio
+    archivo.seek(punto.desplazamiento)
+    leidos = 0
+    while punto.desplazamiento < tamano:
+        bloque = archivo.read(min(tamano_bloque, tamano - punto.desplazamiento))
+        if not bloque:
+            break
+        punto.desplazamiento += len(bloque)
+        leidos += len(bloque)
+        lineas, punto.pendiente = _separar_lineas(punto.pendiente + bloque.decode('latin-1'))
+        if not lineas:
+            continue
+        if punto.formatos is None:
+            punto.formatos = detectar_formato(lineas[:200])
+        formatos = {nombre: FORMATOS_LOG[nombre] for nombre in punto.formatos}
+        analizar_logs_parcial(parsear_lineas(lineas, formatos, tamano_muestra=0), categorias=punto.resultado)
+    return punto, leidos
+
+# Resultado de un archivo en el modo incremental, incluida provisionalmente su línea final incompleta
+def _resultado_con_pendiente(punto):
+    if not punto.pendiente:
+        return punto.resultado
+    formatos = {nombre: FORMATOS_LOG[nombre] for nombre in punto.formatos} if punto.formatos else None
+    linea = punto.pendiente[:-1] if punto.pendiente.endswith('\r') else punto.pendiente
+    return combinar_parciales([punto.resultado, analizar_logs_parcial(parsear_lineas([linea], formatos))])
+
+# Archivos de logs de un directorio que entran en el análisis incremental, en orden; se excluye el
+# archivo de estado por si se ha indicado uno dentro del directorio
+def _archivos_directorio(directorio, patron=PATRON_INCREMENTAL, ruta_estado=None):
+    excluidas = {os.path.abspath(ruta) for ruta in (ruta_estado, ruta_estado and ruta_estado + '.tmp') if ruta}
+    return sorted(
+        ruta for ruta in glob.glob(os.path.join(directorio, patron))
+        if os.path.isfile(ruta) and not ruta.endswith('.gz') and os.path.abspath(ruta) not in excluidas
+    )
+
+# Función para analizar de forma incremental los logs de un directorio local. Los puntos de control
+# (inodo, desplazamiento, línea incompleta y resultados acumulados de cada archivo) se guardan entre
+# ejecuciones en 'ruta_estado' (por defecto un archivo JSON en 'directorio_estado', fuera del
+# directorio analizado), así que cada ejecución solo lee los bytes nuevos y el estado solo se
+# reescribe si algo ha cambiado. Los archivos que ya no existen dejan de contar. Los errores de
+# lectura de los logs o del estado se informan con reportar_error.
+# Devuelve el resultado combinado y los bytes leídos en esta ejecución.
+def analizar_directorio_incremental(directorio, patron=PATRON_INCREMENTAL, ruta_estado=None, directorio_estado=None):
+    ruta_estado = ruta_estado or ruta_estado_incremental(directorio, patron, directorio_estado)
+    puntos = _leer_estado_incremental(ruta_estado)
+
+    actuales, resultados, bytes_leidos = {}, [], 0
+    cambiado = not os.path.exists(ruta_estado)
+    for ruta in _archivos_directorio(directorio, patron, ruta_estado):
+        try:
+            with open(ruta, 'rb') as archivo:
+                info = os.fstat(archivo.fileno())
+                inodo = (info.st_dev, info.st_ino)
+                anterior = puntos.get(inodo)
+                punto, leidos = _avanzar_archivo(anterior or PuntoControl(inodo), archivo, info.st_size)
+        except OSError as e:
+            reportar_error(f"No se pudo leer el archivo {ruta}: {e}")
+            continue
+        cambiado = cambiado or leidos > 0 or punto is not anterior
+        actuales[inodo] = punto
+        resultados.append(_resultado_con_pendiente(punto))
+        bytes_leidos += leidos
+
+    if cambiado or actuales.keys() != puntos.keys():
+        _guardar_estado_incremental(ruta_estado, actuales)
+    return combinar_parciales(resultados), bytes_leidos
+
+# Función para analizar desde cero los mismos archivos que el modo incremental; es la referencia con
+# la que se compara el resultado incremental (benchmark.py incremental)
+def analizar_directorio_completo(directorio, patron=PATRON_INCREMENTAL):
+    resultados = []
+    for ruta in _archivos_directorio(directorio, patron):
+        with open(ruta, 'rb') as archivo:
+            resultados.append(analizar_logs_parcial(parsear_lineas(leer_lineas(archivo))))
+    return combinar_parciales(resultados)
+
+# Ruta de un archivo abierto si es un archivo normal en disco sin comprimir, que los procesos pueden
+# leer por partes; None si está en memoria (BytesIO, archivos subidos) o se lee descomprimiéndolo
+# (gzip.GzipFile también tiene fileno() y el nombre del .gz, pero sus bytes en disco no son el texto)
+def _ruta_en_disco(archivo):
+    ruta = getattr(archivo, 'name', None)
+    if not isinstance(archivo, io.BufferedReader) or not isinstance(ruta, str) or ruta.endswith('.gz'):
+        return None
+    return ruta if os.path.isfile(ruta) else None
+
+# Función para analizar un conjunto de archivos abiertos en modo binario, en el modo indicado; devuelve
+# las cuatro categorías, el total de logs y la clave de contenido de cada archivo (None sin caché).
+# Con 'cache', los registros leídos y los resultados de cada archivo se guardan con clave por
+# contenido, de modo que volver a analizar los mismos archivos solo cuesta calcular su huella.
+# Con 'instrumentacion' se miden las etapas (huella, lectura, análisis, combinación) y se cuentan
+# los aciertos por regla; los bytes leídos son la posición final de cada archivo, así que un archivo
+# cuyos resultados vienen de la caché no suma bytes a la lectura. Con 'compacto', el análisis
+# secuencial guarda los eventos en el almacén compacto (ver analizar_logs).
+def analizar_archivos(archivos, vectorizado=False, procesos=1, cache=None, instrumentacion=None, compacto=False):
+    claves = [None] * len(archivos)
+    if cache is not None:
+        with medir_etapa(instrumentacion, 'huella'):
+            claves = [f"{VERSION_REGLAS}:{huella_contenido(archivo)}:{extension_logs(archivo.name)}" for archivo in archivos]
+
+    # Un resultado calculado con errores de lectura (vacío o incompleto) no se guarda en la caché,
+    # para que el error se vuelva a mostrar y el archivo se vuelva a leer en el siguiente análisis
+    def en_cache(clave, funcion):
+        if cache is None:
+            return funcion()
+        valor = cache.obtener(clave)
+        if valor is None:
+            errores = errores_reportados()
+            valor = funcion()
+            if errores_reportados() == errores:
+                cache.guardar(clave, valor)
+        return valor
+
+    if vectorizado:
+        import pandas as pd
+        # Se guarda en caché cada archivo ya clasificado; solo la combinación y el groupby se
+        # repiten cuando todos los archivos están en caché
+        def clasificar(archivo):
+            with medir_etapa(instrumentacion, 'lectura') as etapa:
+                registros = leer_logs_df(archivo)
+                etapa.filas += len(registros)
+                etapa.bytes_leidos += archivo.tell()
+            with medir_etapa(instrumentacion, 'analisis') as etapa:
+                registros = clasificar_df(registros)
+                etapa.filas += len(registros)
+            return registros
+        clasificados = [
+            en_cache(f"analisis_df:{clave}", lambda archivo=archivo: clasificar(archivo))
+            for archivo, clave in zip(archivos, claves)
+        ]
+        with medir_etapa(instrumentacion, 'combinacion'):
+            df = clasificados[0] if len(clasificados) == 1 else pd.concat(clasificados, ignore_index=True)
+            resultado = vistas_df(df)
+    elif procesos > 1:
+        claves_parciales = [f"parcial:{LIMITE_MUESTRAS}:{clave}" for clave in claves]
+        resultados = [cache.obtener(clave) if cache is not None else None for clave in claves_parciales]
+        pendientes = [posicion for posicion, resultado in enumerate(resultados) if resultado is None]
+        if pendientes:
+            # Los archivos en disco se pasan por su ruta y los procesos leen sus fragmentos; solo
+            # los archivos en memoria (los subidos desde la interfaz web) se envían con su contenido
+            with medir_etapa(instrumentacion, 'lectura') as etapa:
+                datos = [
+                    (archivos[posicion].name, _ruta_en_disco(archivos[posicion]) or archivos[posicion].read())
+                    for posicion in pendientes
+                ]
+                etapa.bytes_leidos += sum(
+                    os.path.getsize(contenido) if isinstance(contenido, str) else len(contenido) for _, contenido in datos
+                )
+            with medir_etapa(instrumentacion, 'analisis') as etapa:
+                con_errores = set()
+                calculados = analizar_archivos_en_paralelo(datos, procesos, con_errores=con_errores)
+                etapa.filas += sum(contar_eventos(eventos) for resultado in calculados for eventos in resultado)
+            for indice, (posicion, resultado) in enumerate(zip(pendientes, calculados)):
+                resultados[posicion] = resultado
+                if cache is not None and indice not in con_errores:
+                    cache.guardar(claves_parciales[posicion], resultado)
+        with medir_etapa(instrumentacion, 'combinacion'):
+            resultado = combinar_parciales(resultados)
+    else:
+        with medir_etapa(instrumentacion, 'analisis') as etapa:
+            def analizar(archivo):
+                resultado = analizar_logs(medir_iterable(instrumentacion, leer_logs(archivo), 'lectura'), compacto=compacto)
+                etapa.filas += sum(contar_eventos(eventos) for eventos in resultado)
+                return resultado
+            resultados = [
+                en_cache(f"analisis:{'compacto' if compacto else 'listas'}:{clave}", lambda archivo=archivo: analizar(archivo))
+                for archivo, clave in zip(archivos, claves)
+            ]
+        if instrumentacion is not None:
+            instrumentacion.sumar('lectura', bytes_leidos=sum(archivo.tell() for archivo in archivos))
+        with medir_etapa(instrumentacion, 'combinacion'):
+            resultado = combinar_resultados(resultados)
+    if instrumentacion is not None:
+        instrumentacion.contar_aciertos(aciertos_reglas(resultado))
+    return resultado, sum(contar_eventos(eventos) for eventos in resultado), claves
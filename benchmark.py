@@ -0,0 +1,556 @@
+import argparse
+import datetime
+import gc
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+from docx import Document
+
+from auditoria_logs import (
+    REGLAS, COLUMNAS_LOG, Clasificador, RegistroLog, leer_lineas, leer_logs, parsear_lineas, analizar_logs, analizar_logs_df,
+    analizar_en_paralelo, analizar_archivos, generar_resumen, generar_explicacion, generar_detalle_csv, agrupar_eventos,
+    combinar_patrones, analizar_directorio_incremental, analizar_directorio_completo, ruta_estado_incremental
+)
+from informe_word import generar_informe_word, agregar_tabla_rapida
+from generador_logs import GeneradorLogs, FRACCION_NO_RECONOCIDOS
+from referencias_prueba import (
+    reglas_sinteticas, mensajes_de_prueba, clasificacion_lineal, cadena_if_elif, generar_explicacion_original,
+    mensajes_de_verificacion, dataframe_de_prueba, firma_parcial
+)
+
+# Número de mensajes en los que el clasificador compilado no da la misma explicación que la cadena original
+def diferencias_cadena_original(mensajes):
+    return sum(
+        generar_explicacion_original(registro) != generar_explicacion(registro)
+        for registro in (RegistroLog('INFO', message, '') for message in mensajes)
+    )
+
+# Mide líneas por segundo de una función de clasificación; se queda con la mejor de varias repeticiones
+def medir(funcion, mensajes, repeticiones=3):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for message in mensajes:
+            funcion(message)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return len(mensajes) / mejor
+
+# Micro-benchmark del clasificador a medida que crece el número de reglas, frente a la cadena if/elif
+# original generada para cada tabla. Antes comprueba que con la tabla real da la misma explicación
+# que la cadena original y que con cada tabla da la misma regla que el recorrido lineal; termina con
+# código 1 si alguna difiere.
+def bench_clasificador(args):
+    diferencias = diferencias_cadena_original(mensajes_de_verificacion(REGLAS))
+    print(f"Diferencias con la cadena if/elif original: {diferencias}")
+    registros = list(GeneradorLogs().registros(args.lineas))
+    original = medir(generar_explicacion_original, registros)
+    compilado = medir(generar_explicacion, registros)
+    print(f"generar_explicacion sobre logs sintéticos: cadena original {original:,.0f} l/s, clasificador {compilado:,.0f} l/s\n")
+    print(f"{'reglas':>8} {'cadena if/elif (l/s)':>21} {'clasificador (l/s)':>19} {'aceleración':>12}")
+    for cantidad in args.reglas:
+        reglas = REGLAS + reglas_sinteticas(max(cantidad - len(REGLAS), 0))
+        mensajes = mensajes_de_prueba(reglas, args.lineas)
+        lineal, clasificador = clasificacion_lineal(reglas), Clasificador(reglas)
+        diferencias += sum(lineal(message) != clasificador.buscar(message) for message in mensajes_de_verificacion(reglas)[:100_000])
+        cadena, compilado = medir(cadena_if_elif(reglas), mensajes), medir(clasificador.buscar, mensajes)
+        print(f"{len(reglas):>8} {cadena:>21,.0f} {compilado:>19,.0f} {compilado / cadena:>11.2f}x")
+    return 1 if diferencias else 0
+
+# Escribe un archivo .log sintético de aproximadamente el tamaño indicado
+def escribir_log(ruta, megabytes, semilla=0):
+    mensajes = mensajes_de_prueba(REGLAS, 10_000, semilla)
+    objetivo = megabytes * 1024 * 1024
+    escritos = 0
+    with open(ruta, 'w', encoding='latin-1') as archivo:
+        while escritos < objetivo:
+            for message in mensajes:
+                linea = f"2024-05-01 12:00:00 ERROR {message}\n"
+                archivo.write(linea)
+                escritos += len(linea)
+
+# Proceso hijo: lee un archivo con el modo indicado e imprime líneas y RSS máximo (en KB)
+def bench_lectura_hijo(args):
+    with open(args.ruta, 'rb') as archivo:
+        if args.modo == 'completo':
+            lineas = len(archivo.read().decode('latin-1').splitlines())
+        else:
+            lineas = sum(1 for _ in leer_lineas(archivo))
+    print(lineas, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+# RSS máximo de la lectura completa frente a la lectura por bloques según el tamaño del archivo
+def bench_lectura(args):
+    print(f"{'MB':>6} {'líneas':>12} {'RSS completo (MB)':>18} {'RSS bloques (MB)':>17}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for megabytes in args.megabytes:
+            ruta = os.path.join(directorio, f'bench_{megabytes}.log')
+            escribir_log(ruta, megabytes)
+            rss = {}
+            for modo in ('completo', 'bloques'):
+                salida = subprocess.run(
+                    [sys.executable, __file__, '_lectura', modo, ruta],
+                    check=True, capture_output=True, text=True
+                ).stdout.split()
+                lineas, rss[modo] = int(salida[0]), int(salida[1]) / 1024
+            print(f"{megabytes:>6} {lineas:>12,} {rss['completo']:>18,.1f} {rss['bloques']:>17,.1f}")
+
+# Análisis fila a fila frente al análisis vectorizado sobre el DataFrame
+def bench_vectorizado(args):
+    print(f"{'filas':>12} {'fila a fila (s)':>16} {'vectorizado (s)':>16} {'aceleración':>12}")
+    for filas in args.filas:
+        df = dataframe_de_prueba(filas, args.mensajes_distintos)
+        registros = [RegistroLog(*fila) for fila in df.itertuples(index=False, name=None)]
+        inicio = time.perf_counter()
+        analizar_logs(registros)
+        fila_a_fila = time.perf_counter() - inicio
+        del registros
+        inicio = time.perf_counter()
+        analizar_logs_df(df)
+        vectorizado = time.perf_counter() - inicio
+        print(f"{filas:>12,} {fila_a_fila:>16.3f} {vectorizado:>16.3f} {fila_a_fila / vectorizado:>11.1f}x")
+
+# Escalado del análisis en paralelo según el número de procesos
+def bench_paralelo(args):
+    with tempfile.TemporaryDirectory() as directorio:
+        # Los archivos se pasan por su ruta, como los de la línea de comandos: cada proceso lee sus fragmentos
+        archivos = []
+        for i in range(args.archivos):
+            ruta = os.path.join(directorio, f'bench_{i}.log')
+            escribir_log(ruta, args.megabytes, semilla=i)
+            archivos.append((f'bench_{i}.log', ruta))
+        print(f"{'procesos':>8} {'tiempo (s)':>11} {'aceleración':>12}")
+        referencia = None
+        for procesos in args.procesos:
+            inicio = time.perf_counter()
+            analizar_en_paralelo(archivos, procesos)
+            duracion = time.perf_counter() - inicio
+            referencia = referencia or duracion
+            print(f"{procesos:>8} {duracion:>11.2f} {referencia / duracion:>11.1f}x")
+
+# Lectura anterior de un .xlsx: todo el libro con pandas y conversión a listas
+def _leer_excel_completo(ruta):
+    df = pd.read_excel(ruta)
+    return iter(df[COLUMNAS_LOG].values.tolist())
+
+# Lectura actual de un archivo tabular mediante leer_logs
+def _leer_tabular(ruta):
+    with open(ruta, 'rb') as archivo:
+        contenido = io.BytesIO(archivo.read())
+    contenido.name = os.path.basename(ruta)
+    return iter(leer_logs(contenido))
+
+# Tiempo hasta la primera fila y filas por segundo de la lectura de archivos tabulares
+def bench_excel(args):
+    df = dataframe_de_prueba(args.filas, 1000)
+    for i in range(args.columnas_extra):
+        df[f'Extra {i}'] = f'valor {i}'
+    print(f"{'lector':>22} {'primera fila (s)':>17} {'total (s)':>10} {'filas/s':>12}")
+    with tempfile.TemporaryDirectory() as directorio:
+        rutas = {extension: os.path.join(directorio, f'bench{extension}') for extension in ('.xlsx', '.csv', '.parquet')}
+        df.to_excel(rutas['.xlsx'], index=False)
+        df.to_csv(rutas['.csv'], index=False)
+        df.to_parquet(rutas['.parquet'], index=False)
+        lectores = [
+            ('pd.read_excel (.xlsx)', _leer_excel_completo, rutas['.xlsx']),
+            ('leer_logs (.xlsx)', _leer_tabular, rutas['.xlsx']),
+            ('leer_logs (.csv)', _leer_tabular, rutas['.csv']),
+            ('leer_logs (.parquet)', _leer_tabular, rutas['.parquet']),
+        ]
+        for nombre, lector, ruta in lectores:
+            inicio = time.perf_counter()
+            filas = lector(ruta)
+            next(filas)
+            primera = time.perf_counter() - inicio
+            total = 1 + sum(1 for _ in filas)
+            duracion = time.perf_counter() - inicio
+            print(f"{nombre:>22} {primera:>17.3f} {duracion:>10.3f} {total / duracion:>12,.0f}")
+
+# Resultado de análisis sintético con el número de eventos indicado
+def resultado_de_prueba(eventos):
+    df = dataframe_de_prueba(eventos, 1000)
+    return analizar_logs([RegistroLog(*fila) for fila in df.itertuples(index=False, name=None)])
+
+# Tiempo de construcción y tamaño del informe Word según el número de eventos
+def bench_informe(args):
+    print(f"{'eventos':>10} {'modo':>10} {'tiempo (s)':>11} {'tamaño (KB)':>12}")
+    for eventos in args.eventos:
+        resultado = resultado_de_prueba(eventos)
+        resumen = generar_resumen(*resultado)
+        for modo in args.modos:
+            inicio = time.perf_counter()
+            buffer = generar_informe_word(resumen, *resultado, eventos, agrupado=(modo == 'agrupado'))
+            duracion = time.perf_counter() - inicio
+            print(f"{eventos:>10,} {modo:>10} {duracion:>11.2f} {len(buffer.getvalue()) / 1024:>12,.0f}")
+
+# Tabla construida celda a celda con python-docx, como se hacía antes de agregar_tabla_rapida
+def _tabla_por_celdas(doc, encabezados, filas):
+    table = doc.add_table(rows=1, cols=len(encabezados))
+    table.style = 'Table Grid'
+    for posicion, titulo in enumerate(encabezados):
+        table.cell(0, posicion).text = titulo
+    for fila in filas:
+        row = table.add_row().cells
+        for posicion, valor in enumerate(fila):
+            row[posicion].text = str(valor)
+
+# Tiempo de construcción de una tabla de detalle celda a celda frente a la escritura directa del XML
+def bench_tabla(args):
+    filas = [
+        (log.message, log.timestamp, explicacion)
+        for log, explicacion in itertools.chain(*resultado_de_prueba(max(args.filas)))
+    ]
+    print(f"{'filas':>10} {'escritor':>10} {'tiempo (s)':>11} {'filas/s':>12}")
+    for cantidad in args.filas:
+        for nombre, escritor in (('celdas', _tabla_por_celdas), ('rápido', agregar_tabla_rapida)):
+            if nombre not in args.escritores:
+                continue
+            doc = Document()
+            inicio = time.perf_counter()
+            escritor(doc, ['Mensaje', 'Hora', 'Explicación'], filas[:cantidad])
+            doc.save(io.BytesIO())
+            duracion = time.perf_counter() - inicio
+            print(f"{cantidad:>10,} {nombre:>10} {duracion:>11.2f} {cantidad / duracion:>12,.0f}")
+
+# Memoria de los resultados y tiempos de análisis y de agrupación: listas de (log, explicacion)
+# frente al almacén compacto de eventos. Las líneas llevan identificadores distintos, como los logs
+# reales, así que cada registro tiene sus propias cadenas.
+def bench_almacen(args):
+    severidades = ['ERROR', 'WARNING', 'CRITICAL', 'INFO']
+    print(f"{'eventos':>10} {'representación':>15} {'analizar (s)':>13} {'memoria (MB)':>13} {'bytes/evento':>13} {'agrupar (s)':>12}")
+    for eventos in args.eventos:
+        aleatorio = random.Random(0)
+        lineas = [
+            f"2024-05-01 {segundo // 3600 % 24:02d}:{segundo // 60 % 60:02d}:{segundo % 60:02d},{segundo % 1000:03d} {aleatorio.choice(severidades)} {mensaje}"
+            for segundo, mensaje in enumerate(mensajes_de_prueba(REGLAS, eventos))
+        ]
+        registros = list(parsear_lineas(lineas))
+        for representacion, compacto in (('listas', False), ('almacén', True)):
+            gc.collect()
+            inicio = time.perf_counter()
+            resultado = analizar_logs(registros, compacto=compacto)
+            analisis = time.perf_counter() - inicio
+            del resultado
+            gc.collect()
+            tracemalloc.start()
+            resultado = analizar_logs(parsear_lineas(lineas), compacto=compacto)
+            gc.collect()
+            memoria = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            inicio = time.perf_counter()
+            for eventos_categoria in resultado:
+                agrupar_eventos(eventos_categoria)
+            duracion = time.perf_counter() - inicio
+            print(
+                f"{eventos:>10,} {representacion:>15} {analisis:>13.3f} {memoria / 1e6:>13.1f} "
+                f"{memoria / eventos:>13.0f} {duracion:>12.3f}"
+            )
+            del resultado
+
+# Análisis incremental de un directorio frente al análisis completo de los mismos archivos: primera
+# ejecución, ejecución sin datos nuevos, datos añadidos (con una línea final incompleta) y rotación.
+# Muestra el tiempo, los bytes leídos y el tamaño del estado de cada paso; termina con código 1 si
+# algún resultado incremental difiere del completo.
+def bench_incremental(args):
+    generador = GeneradorLogs(args.semilla)
+    lineas = generador.lineas(None)
+    diferencias = 0
+    with tempfile.TemporaryDirectory() as directorio, tempfile.TemporaryDirectory() as directorio_estado:
+        log = os.path.join(directorio, 'app.log')
+        ruta_estado = ruta_estado_incremental(directorio, directorio_estado=directorio_estado)
+
+        def escribir(cantidad, final=''):
+            with open(log, 'a', encoding='latin-1', errors='replace', newline='\n') as archivo:
+                archivo.writelines(linea + '\n' for linea in itertools.islice(lineas, cantidad))
+                archivo.write(final)
+
+        def rotar():
+            os.replace(log, log + '.1')
+            escribir(args.lineas_nuevas)
+
+        siguiente = next(lineas)
+        pasos = [
+            ('inicial', lambda: escribir(args.lineas)),
+            ('sin cambios', lambda: None),
+            ('añadido', lambda: escribir(args.lineas_nuevas, siguiente[:len(siguiente) // 2])),
+            ('línea completada', lambda: escribir(0, siguiente[len(siguiente) // 2:] + '\n')),
+            ('rotación', rotar),
+        ]
+        print(f"{'paso':>18} {'tiempo (s)':>11} {'bytes leídos':>13} {'estado (KB)':>12} {'completo (s)':>13}  resultado")
+        for nombre, preparar in pasos:
+            preparar()
+            inicio = time.perf_counter()
+            resultado, bytes_leidos = analizar_directorio_incremental(directorio, directorio_estado=directorio_estado)
+            duracion = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            completo = analizar_directorio_completo(directorio)
+            duracion_completo = time.perf_counter() - inicio
+            igual = firma_parcial(resultado) == firma_parcial(completo)
+            diferencias += not igual
+            print(
+                f"{nombre:>18} {duracion:>11.3f} {bytes_leidos:>13,} {os.path.getsize(ruta_estado) / 1024:>12,.0f} "
+                f"{duracion_completo:>13.3f}  {'igual' if igual else 'DISTINTO'}"
+            )
+    return 1 if diferencias else 0
+
+# Versión del formato de resultados del conjunto de benchmarks
+VERSION_SUITE = 1
+
+# Baseline por defecto del conjunto de benchmarks, junto a este archivo. No se guarda en el
+# repositorio: los tiempos solo son comparables en la máquina que la midió, así que cada máquina (o
+# la integración continua, a partir de la rama base) la crea con --guardar-referencia.
+RUTA_REFERENCIA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_referencia.json')
+
+# Etapas del conjunto de benchmarks, en orden de ejecución
+ETAPAS_SUITE = [
+    'lectura_log', 'lectura_xlsx', 'clasificacion', 'analisis', 'agrupacion', 'patrones', 'informe_word', 'detalle_csv',
+    'extremo_a_extremo_log', 'extremo_a_extremo_xlsx',
+]
+
+# Aumento relativo del tiempo o de la memoria a partir del cual una etapa se marca como regresión
+TOLERANCIA_REGRESION = 0.2
+
+# Mide una etapa del conjunto de benchmarks. 'preparar' devuelve los argumentos de cada ejecución
+# fuera del tiempo medido (por ejemplo un archivo en memoria con la posición al inicio). El tiempo
+# es la mediana de las repeticiones; la memoria es el pico reservado en una ejecución aparte con
+# tracemalloc, que ralentiza la ejecución y por eso no se mezcla con la medida del tiempo.
+def medir_etapa_suite(ejecutar, filas, repeticiones, preparar=tuple):
+    tiempos = []
+    for _ in range(repeticiones):
+        argumentos = preparar()
+        gc.collect()
+        inicio = time.perf_counter()
+        ejecutar(*argumentos)
+        tiempos.append(time.perf_counter() - inicio)
+    argumentos = preparar()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        ejecutar(*argumentos)
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    mediana = statistics.median(tiempos)
+    return {
+        'filas': filas,
+        'repeticiones': repeticiones,
+        'segundos': round(mediana, 6),
+        'segundos_min': round(min(tiempos), 6),
+        'filas_por_segundo': round(filas / mediana, 1),
+        'latencia_por_fila_us': round(mediana / filas * 1e6, 3),
+        'pico_memoria_bytes': pico,
+    }
+
+# Archivo en memoria con nombre, como los que reciben leer_logs y analizar_archivos
+def archivo_en_memoria(contenido, nombre):
+    archivo = io.BytesIO(contenido)
+    archivo.name = nombre
+    return archivo
+
+# Análisis completo de un conjunto de archivos: lectura, análisis, resumen, informe Word agrupado y detalle CSV
+def extremo_a_extremo(archivos):
+    resultado, total_logs, _ = analizar_archivos(archivos)
+    resumen = generar_resumen(*resultado)
+    generar_informe_word(resumen, *resultado, total_logs, agrupado=True)
+    generar_detalle_csv(*resultado)
+
+# Ejecuta las etapas del conjunto de benchmarks sobre entradas sintéticas generadas con la semilla
+# indicada; devuelve los resultados en un diccionario serializable como JSON
+def ejecutar_suite(args):
+    generador = GeneradorLogs(args.semilla, fraccion_no_reconocidos=args.no_reconocidos)
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_log, ruta_xlsx = os.path.join(directorio, 'suite.log'), os.path.join(directorio, 'suite.xlsx')
+        generador.escribir_log(ruta_log, lineas=args.lineas)
+        generador.escribir_xlsx(ruta_xlsx, args.filas_xlsx)
+        with open(ruta_log, 'rb') as archivo:
+            contenido_log = archivo.read()
+        with open(ruta_xlsx, 'rb') as archivo:
+            contenido_xlsx = archivo.read()
+
+    registros = list(leer_logs(archivo_en_memoria(contenido_log, 'suite.log')))
+    resultado = analizar_logs(registros)
+    resumen = generar_resumen(*resultado)
+    patrones = combinar_patrones(*resultado)
+    total = len(registros)
+
+    etapas = {
+        'lectura_log': (lambda archivo: sum(1 for _ in leer_logs(archivo)), total, lambda: (archivo_en_memoria(contenido_log, 'suite.log'),)),
+        'lectura_xlsx': (lambda archivo: sum(1 for _ in leer_logs(archivo)), args.filas_xlsx, lambda: (archivo_en_memoria(contenido_xlsx, 'suite.xlsx'),)),
+        'clasificacion': (lambda: [generar_explicacion(log) for log in registros], total, tuple),
+        'analisis': (lambda: analizar_logs(registros), total, tuple),
+        'agrupacion': (lambda: [agrupar_eventos(eventos) for eventos in resultado], total, tuple),
+        'patrones': (lambda: combinar_patrones(*resultado), total, tuple),
+        'informe_word': (lambda: generar_informe_word(resumen, *resultado, total, agrupado=True, patrones=patrones), total, tuple),
+        'detalle_csv': (lambda: generar_detalle_csv(*resultado), total, tuple),
+        'extremo_a_extremo_log': (extremo_a_extremo, total, lambda: ([archivo_en_memoria(contenido_log, 'suite.log')],)),
+        'extremo_a_extremo_xlsx': (extremo_a_extremo, args.filas_xlsx, lambda: ([archivo_en_memoria(contenido_xlsx, 'suite.xlsx')],)),
+    }
+    resultados = {}
+    for nombre in args.etapas or ETAPAS_SUITE:
+        ejecutar, filas, preparar = etapas[nombre]
+        resultados[nombre] = medir_etapa_suite(ejecutar, filas, args.repeticiones, preparar)
+        medida = resultados[nombre]
+        print(
+            f"{nombre:>24} {medida['segundos']:>10.3f} {medida['filas_por_segundo']:>14,.0f} "
+            f"{medida['latencia_por_fila_us']:>12.2f} {medida['pico_memoria_bytes'] / 1e6:>12.1f}",
+            file=sys.stderr
+        )
+    return {**entorno_suite(args), 'fecha': datetime.datetime.now().isoformat(timespec='seconds'), 'etapas': resultados}
+
+# Datos que deben coincidir con los de la referencia para que los tiempos sean comparables: versión
+# de la suite, versión de Python, plataforma y parámetros de la ejecución
+def entorno_suite(args):
+    return {
+        'version_suite': VERSION_SUITE,
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'parametros': {
+            'lineas': args.lineas, 'filas_xlsx': args.filas_xlsx, 'semilla': args.semilla,
+            'no_reconocidos': args.no_reconocidos, 'repeticiones': args.repeticiones,
+        },
+    }
+
+# Compara los resultados con una referencia guardada; devuelve las filas de la comparación
+# (etapa, segundos de referencia y actuales, cociente de tiempo y de memoria, estado). El tiempo
+# comparado es el mínimo de las repeticiones, que es la medida menos sensible a la carga de la máquina.
+def comparar_con_referencia(resultados, referencia, tolerancia=TOLERANCIA_REGRESION):
+    comparacion = []
+    for nombre, medida in resultados['etapas'].items():
+        anterior = referencia['etapas'].get(nombre)
+        if anterior is None:
+            comparacion.append((nombre, None, medida['segundos_min'], None, None, 'nueva'))
+            continue
+        tiempo = medida['segundos_min'] / anterior['segundos_min'] if anterior['segundos_min'] else None
+        memoria = medida['pico_memoria_bytes'] / anterior['pico_memoria_bytes'] if anterior['pico_memoria_bytes'] else None
+        if (tiempo or 1) > 1 + tolerancia or (memoria or 1) > 1 + tolerancia:
+            estado = 'regresión'
+        elif (tiempo or 1) < 1 - tolerancia:
+            estado = 'mejora'
+        else:
+            estado = 'igual'
+        comparacion.append((nombre, anterior['segundos_min'], medida['segundos_min'], tiempo, memoria, estado))
+    return comparacion
+
+# Conjunto de benchmarks por etapa y de extremo a extremo sobre logs sintéticos, con resultados en
+# JSON y comparación con una referencia guardada; termina con código 1 si alguna etapa empeora y
+# con código 2 si no hay referencia con la que comparar o se midió en otro entorno (entorno_suite),
+# lo que se comprueba antes de medir
+def bench_suite(args):
+    if not args.guardar_referencia:
+        if not os.path.exists(args.referencia):
+            print(f"Error: sin referencia en {args.referencia}; use --guardar-referencia para crearla", file=sys.stderr)
+            return 2
+        with open(args.referencia, encoding='utf-8') as archivo:
+            referencia = json.load(archivo)
+        distintos = [clave for clave, valor in entorno_suite(args).items() if referencia.get(clave) != valor]
+        if distintos:
+            for clave in distintos:
+                print(f"Error: la referencia se midió con otro valor de '{clave}': {referencia.get(clave)}", file=sys.stderr)
+            print("Los tiempos no son comparables; cree una referencia en este entorno con --guardar-referencia", file=sys.stderr)
+            return 2
+    print(f"{'etapa':>24} {'tiempo (s)':>10} {'filas/s':>14} {'µs/fila':>12} {'pico (MB)':>12}", file=sys.stderr)
+    resultados = ejecutar_suite(args)
+    contenido = json.dumps(resultados, ensure_ascii=False, indent=2)
+    if args.salida == '-':
+        print(contenido)
+    elif args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            archivo.write(contenido)
+    if args.guardar_referencia:
+        with open(args.referencia, 'w', encoding='utf-8') as archivo:
+            archivo.write(contenido)
+        print(f"Referencia guardada en {args.referencia}", file=sys.stderr)
+        return 0
+    print(f"\n{'etapa':>24} {'referencia (s)':>15} {'actual (s)':>11} {'tiempo':>8} {'memoria':>8}  estado", file=sys.stderr)
+    regresiones = 0
+    for nombre, anterior, actual, tiempo, memoria, estado in comparar_con_referencia(resultados, referencia, args.tolerancia):
+        regresiones += estado == 'regresión'
+        print(
+            f"{nombre:>24} {anterior if anterior is not None else float('nan'):>15.3f} {actual:>11.3f} "
+            f"{tiempo if tiempo is not None else float('nan'):>7.2f}x {memoria if memoria is not None else float('nan'):>7.2f}x  {estado}",
+            file=sys.stderr
+        )
+    return 1 if regresiones else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de la auditoría de logs")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    clasificador = subparsers.add_parser('clasificador', help="Líneas por segundo del clasificador según el número de reglas y comprobación del orden de prioridad")
+    clasificador.add_argument('--reglas', type=int, nargs='+', default=[22, 50, 100, 200, 500])
+    clasificador.add_argument('--lineas', type=int, default=100_000)
+    clasificador.set_defaults(funcion=bench_clasificador)
+
+    lectura = subparsers.add_parser('lectura', help="RSS máximo de la lectura de .log según el tamaño del archivo")
+    lectura.add_argument('--megabytes', type=int, nargs='+', default=[10, 50, 200])
+    lectura.set_defaults(funcion=bench_lectura)
+
+    vectorizado = subparsers.add_parser('vectorizado', help="Análisis fila a fila frente al análisis vectorizado con pandas")
+    vectorizado.add_argument('--filas', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    vectorizado.add_argument('--mensajes-distintos', type=int, default=1000)
+    vectorizado.set_defaults(funcion=bench_vectorizado)
+
+    paralelo = subparsers.add_parser('paralelo', help="Escalado del análisis en paralelo según el número de procesos")
+    paralelo.add_argument('--archivos', type=int, default=8)
+    paralelo.add_argument('--megabytes', type=int, default=20)
+    paralelo.add_argument('--procesos', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    paralelo.set_defaults(funcion=bench_paralelo)
+
+    excel = subparsers.add_parser('excel', help="Tiempo hasta la primera fila y rendimiento de la lectura de .xlsx/.csv/.parquet")
+    excel.add_argument('--filas', type=int, default=100_000)
+    excel.add_argument('--columnas-extra', type=int, default=10)
+    excel.set_defaults(funcion=bench_excel)
+
+    informe = subparsers.add_parser('informe', help="Tiempo de construcción y tamaño del informe Word")
+    informe.add_argument('--eventos', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    informe.add_argument('--modos', nargs='+', choices=['detallado', 'agrupado'], default=['detallado', 'agrupado'])
+    informe.set_defaults(funcion=bench_informe)
+
+    tabla = subparsers.add_parser('tabla', help="Construcción de tablas de detalle celda a celda frente a la escritura directa del XML")
+    tabla.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 500_000])
+    tabla.add_argument('--escritores', nargs='+', choices=['celdas', 'rápido'], default=['celdas', 'rápido'])
+    tabla.set_defaults(funcion=bench_tabla)
+
+    almacen = subparsers.add_parser('almacen', help="Memoria y tiempos de análisis y agrupación de los resultados en listas frente al almacén compacto")
+    almacen.add_argument('--eventos', type=int, nargs='+', default=[100_000, 1_000_000])
+    almacen.set_defaults(funcion=bench_almacen)
+
+    incremental = subparsers.add_parser('incremental', help="Análisis incremental frente al completo tras añadir datos y rotar los logs")
+    incremental.add_argument('--lineas', type=int, default=200_000, help="Líneas iniciales del .log sintético")
+    incremental.add_argument('--lineas-nuevas', type=int, default=10_000, help="Líneas añadidas en cada paso")
+    incremental.add_argument('--semilla', type=int, default=0)
+    incremental.set_defaults(funcion=bench_incremental)
+
+    suite = subparsers.add_parser('suite', help="Rendimiento por etapa y de extremo a extremo sobre logs sintéticos, comparado con una referencia")
+    suite.add_argument('--lineas', type=int, default=200_000, help="Líneas del .log sintético")
+    suite.add_argument('--filas-xlsx', type=int, default=20_000, help="Filas del .xlsx sintético")
+    suite.add_argument('--no-reconocidos', type=float, default=FRACCION_NO_RECONOCIDOS, help="Fracción de mensajes no reconocidos")
+    suite.add_argument('--semilla', type=int, default=0)
+    suite.add_argument('--repeticiones', type=int, default=3)
+    suite.add_argument('--etapas', nargs='+', choices=ETAPAS_SUITE, help="Etapas a medir (por defecto todas)")
+    suite.add_argument('--salida', help="Ruta de los resultados en JSON ('-' para la salida estándar)")
+    suite.add_argument('--referencia', default=RUTA_REFERENCIA, help="Resultados de referencia con los que comparar")
+    suite.add_argument('--guardar-referencia', action='store_true', help="Guarda estos resultados como referencia en lugar de comparar")
+    suite.add_argument('--tolerancia', type=float, default=TOLERANCIA_REGRESION, help="Aumento relativo de tiempo o memoria tolerado")
+    suite.set_defaults(funcion=bench_suite)
+
+    lectura_hijo = subparsers.add_parser('_lectura')
+    lectura_hijo.add_argument('modo', choices=['completo', 'bloques'])
+    lectura_hijo.add_argument('ruta')
+    lectura_hijo.set_defaults(funcion=bench_lectura_hijo)
+
+    args = parser.parse_args()
+    return args.funcion(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
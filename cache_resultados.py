@@ -0,0 +1,197 @@
+import os
+import sys
+import pickle
+import hashlib
+import tempfile
+import threading
+from array import array
+from itertools import islice
+from collections import OrderedDict
+
+# Tamaño de bloque (en bytes) de la lectura de archivos al calcular su huella
+TAMANO_BLOQUE_HUELLA = 1 << 20
+
+# Calcula la huella del contenido de un archivo (bytes o archivo binario con posición al inicio)
+def huella_contenido(file):
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        return hashlib.blake2b(file, digest_size=16).hexdigest()
+    huella = hashlib.blake2b(digest_size=16)
+    for bloque in iter(lambda: file.read(TAMANO_BLOQUE_HUELLA), b''):
+        huella.update(bloque)
+    file.seek(0)
+    return huella.hexdigest()
+
+# Número de elementos de cada contenedor que se miden al estimar el tamaño de un valor
+MUESTRA_TAMANO = 64
+
+# Presupuesto por defecto (en bytes) del nivel en disco de la caché
+PRESUPUESTO_DISCO = 2 * 1024 * 1024 * 1024
+
+# Tipos cuyo tamaño da sys.getsizeof completo (no contienen otros objetos)
+TIPOS_SIMPLES = (str, bytes, bytearray, int, float, complex, bool, type(None), array)
+
+# Atributos de instancia de un objeto, tanto de su __dict__ como de sus __slots__
+def _atributos(objeto):
+    atributos = list(getattr(objeto, '__dict__', {}).values())
+    for clase in type(objeto).__mro__:
+        ranuras = clase.__dict__.get('__slots__', ())
+        for nombre in (ranuras,) if isinstance(ranuras, str) else ranuras:
+            if nombre not in ('__dict__', '__weakref__') and hasattr(objeto, nombre):
+                atributos.append(getattr(objeto, nombre))
+    return atributos
+
+# Estima los bytes que ocupa un valor en memoria sin serializarlo. De cada contenedor se mide una
+# muestra de elementos y se extrapola al resto; los objetos de pandas y numpy informan de su propio
+# uso de memoria y los objetos compartidos se cuentan una sola vez.
+def estimar_tamano(valor, muestra=MUESTRA_TAMANO):
+    vistos = set()
+
+    def tamano(objeto):
+        if id(objeto) in vistos:
+            return 0
+        vistos.add(id(objeto))
+        if isinstance(objeto, TIPOS_SIMPLES):
+            return sys.getsizeof(objeto)
+        uso_memoria = getattr(objeto, 'memory_usage', None)
+        if callable(uso_memoria):
+            uso = uso_memoria(deep=True)
+            return int(uso.sum() if hasattr(uso, 'sum') else uso)
+        if hasattr(objeto, 'nbytes') and hasattr(objeto, 'dtype'):
+            return sys.getsizeof(objeto) + (0 if objeto.base is None else objeto.nbytes)
+        total = sys.getsizeof(objeto)
+        if isinstance(objeto, dict):
+            elementos = [elemento for par in islice(objeto.items(), muestra) for elemento in par]
+            cantidad = 2 * len(objeto)
+        elif isinstance(objeto, (list, tuple, set, frozenset)):
+            elementos = list(islice(objeto, muestra))
+            cantidad = len(objeto)
+        else:
+            elementos = _atributos(objeto)
+            cantidad = len(elementos)
+        if elementos:
+            total += sum(map(tamano, elementos)) * cantidad // len(elementos)
+        return total
+
+    return tamano(valor)
+
+# Los valores del nivel en disco se cargan con pickle, que puede ejecutar código arbitrario: el
+# directorio debe ser privado del usuario que ejecuta la auditoría. Se crea con permisos 0700 y se
+# rechaza (en sistemas POSIX) uno ajeno o en el que otros usuarios puedan escribir.
+def comprobar_directorio_privado(directorio):
+    os.makedirs(directorio, mode=0o700, exist_ok=True)
+    if os.name != 'posix':
+        return
+    info = os.stat(directorio)
+    if info.st_uid != os.getuid() or info.st_mode & 0o022:
+        raise PermissionError(
+            f"El directorio de la caché {directorio} debe pertenecer al usuario actual y no ser "
+            "escribible por otros usuarios, ya que su contenido se carga con pickle")
+
+# Caché de resultados con clave por contenido. Los valores se guardan en memoria con expulsión LRU
+# según un presupuesto de bytes (tamaño estimado con estimar_tamano) y, opcionalmente, en un
+# directorio privado que actúa como segundo nivel persistente entre ejecuciones, con su propio
+# presupuesto: al superarlo se borran los archivos usados hace más tiempo.
+class CacheResultados:
+    def __init__(self, presupuesto_bytes, directorio=None, presupuesto_disco=PRESUPUESTO_DISCO):
+        self.presupuesto_bytes = presupuesto_bytes
+        self.presupuesto_disco = presupuesto_disco
+        self.directorio = directorio
+        self.bytes_en_memoria = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()
+        self._bloqueo = threading.Lock()
+        if directorio:
+            comprobar_directorio_privado(directorio)
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, hashlib.sha256(clave.encode('utf-8')).hexdigest() + '.pkl')
+
+    def _guardar_en_memoria(self, clave, valor, tamano):
+        if clave in self._entradas:
+            self.bytes_en_memoria -= self._entradas.pop(clave)[1]
+        if tamano > self.presupuesto_bytes:
+            return
+        self._entradas[clave] = (valor, tamano)
+        self.bytes_en_memoria += tamano
+        while self.bytes_en_memoria > self.presupuesto_bytes:
+            _, (_, expulsado) = self._entradas.popitem(last=False)
+            self.bytes_en_memoria -= expulsado
+
+    # Borra los archivos del directorio usados hace más tiempo (por fecha de modificación, que se
+    # actualiza en cada lectura) hasta que el total quede dentro del presupuesto del disco
+    def _recortar_disco(self):
+        archivos = []
+        with os.scandir(self.directorio) as entradas:
+            for entrada in entradas:
+                if entrada.name.endswith('.pkl'):
+                    try:
+                        info = entrada.stat()
+                    except FileNotFoundError:
+                        continue
+                    archivos.append((info.st_mtime, info.st_size, entrada.path))
+        total = sum(tamano for _, tamano, _ in archivos)
+        for _, tamano, ruta in sorted(archivos):
+            if total <= self.presupuesto_disco:
+                break
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            total -= tamano
+
+    # Devuelve el valor guardado para la clave, o 'defecto' si no está en ningún nivel
+    def obtener(self, clave, defecto=None):
+        with self._bloqueo:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[0]
+        if self.directorio:
+            ruta = self._ruta(clave)
+            try:
+                with open(ruta, 'rb') as archivo:
+                    datos = archivo.read()
+                os.utime(ruta)
+            except FileNotFoundError:
+                datos = None
+            if datos is not None:
+                valor = pickle.loads(datos)
+                tamano = estimar_tamano(valor)
+                with self._bloqueo:
+                    self._guardar_en_memoria(clave, valor, tamano)
+                    self.aciertos += 1
+                return valor
+        with self._bloqueo:
+            self.fallos += 1
+        return defecto
+
+    # Guarda un valor; no debe modificarse después, ya que se comparte entre ejecuciones
+    def guardar(self, clave, valor):
+        tamano = estimar_tamano(valor)
+        with self._bloqueo:
+            self._guardar_en_memoria(clave, valor, tamano)
+        if self.directorio:
+            datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+            if len(datos) <= self.presupuesto_disco:
+                descriptor, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+                with os.fdopen(descriptor, 'wb') as archivo:
+                    archivo.write(datos)
+                os.replace(temporal, self._ruta(clave))
+                self._recortar_disco()
+        return valor
+
+    # Devuelve el valor de la clave o lo calcula con 'funcion' y lo guarda
+    def obtener_o_calcular(self, clave, funcion):
+        valor = self.obtener(clave, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = self.guardar(clave, funcion())
+        return valor
+
+    def limpiar(self):
+        with self._bloqueo:
+            self._entradas.clear()
+            self.bytes_en_memoria = 0
+
+_AUSENTE = object()
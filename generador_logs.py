@@ -0,0 +1,203 @@
+import sys
+import random
+import argparse
+import datetime
+import itertools
+
+from auditoria_logs import REGLAS, COLUMNAS_LOG, RegistroLog
+
+# Generador de logs sintéticos reproducibles (.log y .xlsx) para los benchmarks y como datos de
+# ejemplo. Los mensajes reconocidos usan los textos de las reglas del clasificador; la mezcla de
+# severidades, la distribución de aciertos por regla y la fracción de mensajes no reconocidos son
+# configurables, y la misma semilla produce siempre el mismo contenido.
+#   python generador_logs.py ejemplo.log --lineas 100000 --severidades INFO=50,ERROR=50 --no-reconocidos 0.2
+#   python generador_logs.py ejemplo.xlsx --lineas 50000 --reglas uniforme
+
+# Mezcla de severidades por defecto (pesos relativos)
+SEVERIDADES = {'INFO': 55, 'WARNING': 25, 'ERROR': 15, 'CRITICAL': 5}
+
+# Exponente por defecto de la distribución de Zipf de los aciertos por regla
+EXPONENTE_ZIPF = 1.1
+
+# Fracción por defecto de mensajes que no coinciden con ninguna regla
+FRACCION_NO_RECONOCIDOS = 0.1
+
+# Mensajes que ninguna regla reconoce; {n} se sustituye por un número para que haya mensajes distintos
+MENSAJES_NO_RECONOCIDOS = [
+    "Unexpected condition in worker {n}",
+    "Cache miss ratio above threshold for shard {n}",
+    "Retrying job {n} after transient error",
+    "Configuration reloaded by operator {n}",
+    "Queue depth at {n} messages",
+    "Maintenance window {n} started",
+    "Unhandled status code {n} from upstream",
+    "Feature flag {n} toggled",
+]
+
+# Fecha del primer registro y separación media (en segundos) entre registros consecutivos
+INICIO = datetime.datetime(2024, 5, 1)
+INTERVALO_MEDIO_SEGUNDOS = 0.5
+
+# Número de registros generados en cada lote de elecciones aleatorias
+TAMANO_LOTE = 10_000
+
+# Formatos de línea de los .log generados, con los mismos nombres que FORMATOS_LOG
+def _linea_iso(registro):
+    return f"{registro.timestamp:%Y-%m-%d %H:%M:%S},{registro.timestamp.microsecond // 1000:03d} {registro.severity} {registro.message}"
+
+def _linea_corchetes(registro):
+    return f"[{registro.severity}] {registro.timestamp:%Y-%m-%d %H:%M:%S} {registro.message}"
+
+def _linea_syslog(registro):
+    fecha = registro.timestamp
+    return f"{fecha:%b} {fecha.day:>2} {fecha:%H:%M:%S} servidor-01 app[4242]: {registro.severity}: {registro.message}"
+
+FORMATOS_LINEA = {
+    'iso': _linea_iso,
+    'corchetes': _linea_corchetes,
+    'syslog': _linea_syslog,
+}
+
+# Pesos de cada regla según la distribución: 'uniforme', 'zipf' (las reglas, en un orden aleatorio
+# fijado por la semilla, reciben pesos 1/k^exponente) o un diccionario {identificador de regla: peso}
+def pesos_reglas(distribucion, reglas=REGLAS, exponente=EXPONENTE_ZIPF, semilla=0):
+    if isinstance(distribucion, dict):
+        desconocidas = set(distribucion) - {regla_id for regla_id, _, _ in reglas}
+        if desconocidas:
+            raise ValueError(f"Reglas desconocidas: {', '.join(sorted(desconocidas))}")
+        return [distribucion.get(regla_id, 0) for regla_id, _, _ in reglas]
+    if distribucion == 'uniforme':
+        return [1] * len(reglas)
+    if distribucion == 'zipf':
+        orden = list(range(len(reglas)))
+        random.Random(semilla).shuffle(orden)
+        pesos = [0.0] * len(reglas)
+        for rango, posicion in enumerate(orden, 1):
+            pesos[posicion] = 1 / rango ** exponente
+        return pesos
+    raise ValueError(f"Distribución de reglas no soportada: {distribucion}")
+
+# Generador de registros sintéticos con una configuración fija. Cada llamada a registros() empieza
+# desde la semilla, así que dos llamadas con la misma cantidad devuelven los mismos registros.
+class GeneradorLogs:
+    def __init__(self, semilla=0, severidades=None, reglas='zipf', exponente_zipf=EXPONENTE_ZIPF,
+                 fraccion_no_reconocidos=FRACCION_NO_RECONOCIDOS, inicio=INICIO,
+                 intervalo_medio=INTERVALO_MEDIO_SEGUNDOS, tabla_reglas=REGLAS):
+        severidades = SEVERIDADES if severidades is None else severidades
+        if not 0 <= fraccion_no_reconocidos <= 1:
+            raise ValueError("La fracción de mensajes no reconocidos debe estar entre 0 y 1")
+        if not severidades or min(severidades.values()) < 0 or sum(severidades.values()) <= 0:
+            raise ValueError("La mezcla de severidades necesita al menos un peso positivo")
+        pesos = pesos_reglas(reglas, tabla_reglas, exponente_zipf, semilla)
+        if fraccion_no_reconocidos < 1 and sum(pesos) <= 0:
+            raise ValueError("La distribución de reglas necesita al menos un peso positivo")
+        self.semilla = semilla
+        self.severidades = list(severidades)
+        self._pesos_severidades = list(itertools.accumulate(severidades.values()))
+        self.textos = [texto for _, texto, _ in tabla_reglas]
+        self._pesos_reglas = list(itertools.accumulate(pesos))
+        self.fraccion_no_reconocidos = fraccion_no_reconocidos
+        self.inicio = inicio
+        self.intervalo_medio = intervalo_medio
+
+    # Genera 'cantidad' registros (sin límite si es None) con fecha datetime, en orden cronológico
+    def registros(self, cantidad=None):
+        aleatorio = random.Random(self.semilla)
+        fecha = self.inicio
+        tasa = 1 / self.intervalo_medio if self.intervalo_medio > 0 else None
+        restantes = cantidad
+        while restantes is None or restantes > 0:
+            lote = TAMANO_LOTE if restantes is None else min(TAMANO_LOTE, restantes)
+            severidades = aleatorio.choices(self.severidades, cum_weights=self._pesos_severidades, k=lote)
+            textos = aleatorio.choices(self.textos, cum_weights=self._pesos_reglas, k=lote) if self._pesos_reglas[-1] > 0 else None
+            for posicion, severity in enumerate(severidades):
+                if textos is None or aleatorio.random() < self.fraccion_no_reconocidos:
+                    message = aleatorio.choice(MENSAJES_NO_RECONOCIDOS).format(n=aleatorio.randrange(1000))
+                else:
+                    message = f"{textos[posicion]} (host=app-{aleatorio.randrange(1, 51):02d}, id={aleatorio.randrange(10**6)})"
+                if tasa is not None:
+                    fecha += datetime.timedelta(seconds=aleatorio.expovariate(tasa))
+                yield RegistroLog(severity, message, fecha)
+            if restantes is not None:
+                restantes -= lote
+
+    # Genera las líneas de texto de los registros en el formato indicado
+    def lineas(self, cantidad=None, formato='iso'):
+        return map(FORMATOS_LINEA[formato], self.registros(cantidad))
+
+    # Escribe un .log con 'lineas' líneas o, si se indica 'megabytes', hasta alcanzar ese tamaño;
+    # devuelve el número de líneas escritas
+    def escribir_log(self, ruta, lineas=None, megabytes=None, formato='iso'):
+        if (lineas is None) == (megabytes is None):
+            raise ValueError("Indique el número de líneas o el tamaño en megabytes")
+        objetivo = megabytes * 1024 * 1024 if megabytes is not None else None
+        escritas = escritos = 0
+        with open(ruta, 'w', encoding='latin-1', errors='replace', newline='\n') as archivo:
+            for linea in self.lineas(lineas, formato):
+                archivo.write(linea + '\n')
+                escritas += 1
+                escritos += len(linea) + 1
+                if objetivo is not None and escritos >= objetivo:
+                    break
+        return escritas
+
+    # Escribe un .xlsx con las columnas de logs y una fila por registro (la fecha como celda de fecha);
+    # devuelve el número de filas escritas
+    def escribir_xlsx(self, ruta, filas):
+        import openpyxl
+        libro = openpyxl.Workbook(write_only=True)
+        hoja = libro.create_sheet('Logs')
+        hoja.append(COLUMNAS_LOG)
+        escritas = 0
+        for registro in self.registros(filas):
+            hoja.append([registro.severity, registro.message, registro.timestamp])
+            escritas += 1
+        libro.save(ruta)
+        return escritas
+
+# Interpreta una lista de pesos 'NOMBRE=peso,NOMBRE=peso' de la línea de comandos
+def _pesos_argumento(texto):
+    pesos = {}
+    for parte in texto.split(','):
+        nombre, separador, peso = parte.partition('=')
+        if not separador:
+            raise argparse.ArgumentTypeError(f"Se esperaba NOMBRE=peso: {parte}")
+        try:
+            pesos[nombre.strip()] = float(peso)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Peso no numérico: {parte}")
+    return pesos
+
+# Distribución de reglas de la línea de comandos: 'zipf', 'uniforme' o pesos 'regla=peso,regla=peso'
+def _distribucion_argumento(texto):
+    return texto if texto in ('zipf', 'uniforme') else _pesos_argumento(texto)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='generador_logs', description="Genera logs sintéticos (.log o .xlsx)")
+    parser.add_argument('ruta', help="Archivo de salida; la extensión (.log o .xlsx) decide el formato")
+    tamano = parser.add_mutually_exclusive_group(required=True)
+    tamano.add_argument('--lineas', type=int, help="Número de registros")
+    tamano.add_argument('--megabytes', type=float, help="Tamaño aproximado del .log en MB")
+    parser.add_argument('--formato', choices=list(FORMATOS_LINEA), default='iso', help="Formato de línea del .log")
+    parser.add_argument('--severidades', type=_pesos_argumento, help="Mezcla de severidades, por ejemplo INFO=55,WARNING=25,ERROR=15,CRITICAL=5")
+    parser.add_argument('--reglas', type=_distribucion_argumento, default='zipf', help="Distribución de aciertos por regla: zipf, uniforme o regla=peso,regla=peso")
+    parser.add_argument('--exponente-zipf', type=float, default=EXPONENTE_ZIPF)
+    parser.add_argument('--no-reconocidos', type=float, default=FRACCION_NO_RECONOCIDOS, help="Fracción de mensajes no reconocidos (0 a 1)")
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        generador = GeneradorLogs(args.semilla, args.severidades, args.reglas, args.exponente_zipf, args.no_reconocidos)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.ruta.endswith('.xlsx'):
+        if args.lineas is None:
+            parser.error("Los .xlsx se generan por número de filas (--lineas)")
+        escritas = generador.escribir_xlsx(args.ruta, args.lineas)
+    else:
+        escritas = generador.escribir_log(args.ruta, args.lineas, args.megabytes, args.formato)
+    print(f"{escritas} registros escritos en {args.ruta}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+import re
+import itertools
+from io import BytesIO
+from xml.sax.saxutils import escape
+from docx import Document
+from docx.shared import Pt, Inches
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import nsdecls, qn
+from auditoria_logs import REGLAS, CategoriaParcial, agrupar_eventos, combinar_patrones
+
+# Generación del informe de auditoría en formato Word a partir de los resultados del análisis
+
+# Elementos de w:tblPr que el esquema sitúa después de w:tblBorders
+_POSTERIORES_TBL_BORDERS = {qn('w:shd'), qn('w:tblLayout'), qn('w:tblCellMar'), qn('w:tblLook'), qn('w:tblCaption'), qn('w:tblDescription')}
+
+# Función para añadir bordes a una tabla en Word. Los bordes se definen una sola vez en las
+# propiedades de la tabla (w:tblBorders), incluidas las líneas interiores, en lugar de en cada celda.
+def agregar_bordes_tabla(tabla):
+    tblPr = tabla._tbl.tblPr
+    tblBorders = OxmlElement('w:tblBorders')
+    for border_name in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
+        border = OxmlElement(f'w:{border_name}')
+        border.set(qn('w:val'), 'single')
+        border.set(qn('w:sz'), '4')
+        border.set(qn('w:space'), '0')
+        border.set(qn('w:color'), '000000')
+        tblBorders.append(border)
+    siguiente = next((hijo for hijo in tblPr if hijo.tag in _POSTERIORES_TBL_BORDERS), None)
+    if siguiente is not None:
+        siguiente.addprevious(tblBorders)
+    else:
+        tblPr.append(tblBorders)
+
+# Número de filas que se generan y añaden de una vez al escribir tablas grandes
+FILAS_POR_LOTE_TABLA = 5000
+
+_CARACTERES_NO_VALIDOS_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+_SEPARADORES_TEXTO = re.compile('([\t\r\n])')
+
+# Contenido XML de un w:r equivalente a asignar el texto con python-docx: los tabuladores pasan
+# a w:tab y los saltos de línea a w:br. Se eliminan los caracteres que XML no admite.
+def _xml_texto_celda(texto):
+    texto = _CARACTERES_NO_VALIDOS_XML.sub('', texto)
+    partes = []
+    for parte in _SEPARADORES_TEXTO.split(texto):
+        if parte == '\t':
+            partes.append('<w:tab/>')
+        elif parte in ('\r', '\n'):
+            partes.append('<w:br/>')
+        elif parte:
+            espacio = ' xml:space="preserve"' if parte.strip() != parte else ''
+            partes.append(f'<w:t{espacio}>{escape(parte)}</w:t>')
+    return ''.join(partes)
+
+# Función para añadir una tabla completa al documento generando directamente el XML de sus filas.
+# La cabecera se crea con python-docx y las filas se construyen como texto a partir de una fila
+# plantilla con los anchos de columna, y se insertan por lotes; el resultado es el mismo que
+# asignar celda a celda, sin el coste de los objetos de python-docx por celda.
+def agregar_tabla_rapida(doc, encabezados, filas):
+    table = doc.add_table(rows=1, cols=len(encabezados))
+    table.style = 'Table Grid'
+    for posicion, titulo in enumerate(encabezados):
+        table.cell(0, posicion).text = titulo
+    agregar_bordes_tabla(table)
+
+    tbl = table._tbl
+    plantilla = ''.join(
+        f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{gridCol.get(qn("w:w"))}"/></w:tcPr><w:p><w:r>{{}}</w:r></w:p></w:tc>'
+        for gridCol in tbl.tblGrid.gridCol_lst
+    )
+    filas = iter(filas)
+    while True:
+        lote = list(itertools.islice(filas, FILAS_POR_LOTE_TABLA))
+        if not lote:
+            break
+        xml = ''.join(
+            '<w:tr>' + plantilla.format(*(_xml_texto_celda(str(valor)) for valor in fila)) + '</w:tr>'
+            for fila in lote
+        )
+        tbl.extend(parse_xml(f'<w:tbl {nsdecls("w")}>{xml}</w:tbl>'))
+    return table
+
+# Número máximo de filas de eventos y de tipos de evento por sección en el informe agrupado
+LIMITE_FILAS_INFORME = 20
+LIMITE_GRUPOS_INFORME = 50
+
+# Función para añadir la tabla con todos los eventos de una sección (una fila por evento)
+def agregar_tabla_detalle(doc, encabezado_mensaje, eventos):
+    agregar_tabla_rapida(
+        doc, [encabezado_mensaje, 'Hora', 'Explicación'],
+        ((log.message, log.timestamp, explicacion) for log, explicacion in eventos)
+    )
+
+# Función para añadir las tablas de una sección en el informe agrupado: una fila por tipo de evento
+# con su número de ocurrencias y la explicación una sola vez, más los primeros eventos como ejemplo.
+# El tamaño de la sección no depende del número de eventos. 'detalle_csv' indica si el informe se
+# entrega con el CSV de detalle, que es completo salvo para los resultados parciales (solo muestras).
+def agregar_tablas_agrupadas(doc, encabezado_mensaje, eventos, limite_filas=LIMITE_FILAS_INFORME, limite_grupos=LIMITE_GRUPOS_INFORME, detalle_csv=False):
+    grupos = agrupar_eventos(eventos)
+    total = sum(grupo.cantidad for grupo in grupos)
+    agregar_tabla_rapida(
+        doc, [encabezado_mensaje, 'Ocurrencias', 'Primera Hora', 'Última Hora', 'Explicación'],
+        ((grupo.mensaje, grupo.cantidad, grupo.primero, grupo.ultimo, grupo.explicacion) for grupo in grupos[:limite_grupos])
+    )
+    if len(grupos) > limite_grupos:
+        otros = sum(grupo.cantidad for grupo in grupos[limite_grupos:])
+        doc.add_paragraph(f"Además, {len(grupos) - limite_grupos} tipos de evento menos frecuentes suman {otros} ocurrencias.")
+
+    if total and limite_filas:
+        agregar_tabla_rapida(
+            doc, [encabezado_mensaje, 'Hora'],
+            ((log.message, log.timestamp) for log, _ in itertools.islice(eventos, limite_filas))
+        )
+        texto = f"Se muestran {min(total, limite_filas)} de {total} eventos."
+        if detalle_csv and isinstance(eventos, CategoriaParcial):
+            texto += f" El archivo CSV que acompaña al informe contiene una muestra de {len(eventos.muestras)} eventos de esta categoría."
+        elif detalle_csv:
+            texto += " El detalle completo está disponible en el archivo CSV que acompaña al informe."
+        doc.add_paragraph(texto)
+
+# Filas de cada tabla de la sección de patrones recurrentes
+LIMITE_PATRONES_INFORME = 15
+
+_TEXTOS_REGLAS = {regla_id: texto for regla_id, texto, _ in REGLAS}
+
+def _formato_fecha(fecha):
+    return fecha.strftime('%Y-%m-%d %H:%M')
+
+# Función para añadir la sección de patrones recurrentes a partir de los patrones temporales del análisis:
+# periodo cubierto, ráfagas detectadas, intervalos con más errores y eventos críticos y mensajes más repetidos
+def agregar_patrones_recurrentes(doc, patrones, limite=LIMITE_PATRONES_INFORME):
+    rango = patrones.rango()
+    if rango is None:
+        doc.add_paragraph("Los logs analizados no incluyen fechas reconocibles, por lo que no se ha podido estudiar su distribución en el tiempo.")
+    else:
+        doc.add_paragraph(
+            f"Los eventos con fecha abarcan desde {_formato_fecha(rango[0])} hasta {_formato_fecha(rango[1])} "
+            f"y se han agrupado en intervalos de {patrones.ancho_minutos} minutos."
+            + (f" Otros {patrones.sin_fecha} eventos no tienen una fecha reconocible." if patrones.sin_fecha else "")
+        )
+        rafagas = patrones.detectar_rafagas()
+        doc.add_heading('Ráfagas de Eventos', level=2)
+        if rafagas:
+            doc.add_paragraph(
+                f"Se detectaron {len(rafagas)} ráfagas: periodos en los que un mismo tipo de evento se concentra muy por encima "
+                "de su frecuencia habitual, lo que suele indicar picos de carga o procesos concretos que fallan en esos momentos."
+            )
+            agregar_tabla_rapida(
+                doc, ['Severidad', 'Tipo de Evento', 'Inicio', 'Fin', 'Eventos', 'Veces sobre la Media'],
+                (
+                    (rafaga['severity'], _TEXTOS_REGLAS.get(rafaga['regla'], 'No reconocido'), _formato_fecha(rafaga['inicio']),
+                     _formato_fecha(rafaga['fin']), rafaga['eventos'], f"{rafaga['intensidad']:.1f}")
+                    for rafaga in rafagas[:limite]
+                )
+            )
+        else:
+            doc.add_paragraph("No se detectaron ráfagas: los eventos se reparten de forma regular a lo largo del periodo analizado.")
+        picos = patrones.intervalos_pico(limite, {'ERROR', 'CRITICAL'})
+        if picos:
+            doc.add_heading('Intervalos con más Errores y Eventos Críticos', level=2)
+            agregar_tabla_rapida(doc, ['Inicio del Intervalo', 'Errores y Eventos Críticos'], ((_formato_fecha(inicio), total) for inicio, total in picos))
+
+    mensajes = patrones.mensajes_recurrentes(limite)
+    if mensajes:
+        doc.add_heading('Mensajes más Recurrentes', level=2)
+        doc.add_paragraph("Los mensajes se agrupan tras sustituir por <N> los números, horas, direcciones IP e identificadores que contienen.")
+        agregar_tabla_rapida(
+            doc, ['Severidad', 'Mensaje', 'Ocurrencias', 'Ejemplo'],
+            ((severity, plantilla, cantidad, ejemplo) for severity, plantilla, cantidad, ejemplo in mensajes)
+        )
+
+# Función para generar el informe de auditoría en formato Word.
+# Con 'agrupado' cada sección resume los eventos por tipo y muestra como máximo 'limite_filas' eventos.
+# Los patrones temporales se calculan a partir de las categorías si no se pasan en 'patrones'.
+# 'detalle_csv' indica si el informe se entrega junto con el CSV de detalle (generar_detalle_csv).
+def generar_informe_word(resumen, errores, advertencias, eventos_criticos, otros_eventos, total_logs, agrupado=False, limite_filas=LIMITE_FILAS_INFORME, patrones=None, detalle_csv=False):
+    doc = Document()
+    doc.add_heading('INFORME DE AUDITORÍA DE LOGS DEL SISTEMA', 0)
+    doc.add_paragraph(f'Fecha de Generación: {resumen["Fecha del resumen"]}', style='Heading 3')
+    doc.add_paragraph(f'Total de Logs Analizados: {total_logs}')
+    doc.add_paragraph("\n")
+
+    # Índice
+    doc.add_heading('Índice', level=1)
+    doc.add_paragraph('1. Introducción')
+    doc.add_paragraph('2. Objetivo de la Auditoría')
+    doc.add_paragraph('3. Metodología')
+    doc.add_paragraph('4. Resumen Ejecutivo')
+    doc.add_paragraph('5. Análisis de Errores')
+    doc.add_paragraph('6. Análisis de Advertencias')
+    doc.add_paragraph('7. Análisis de Eventos Críticos')
+    doc.add_paragraph('8. Patrones Recurrentes y Observaciones')
+    doc.add_paragraph('9. Impacto Potencial de los Problemas Identificados')
+    doc.add_paragraph('10. Recomendaciones Detalladas')
+    doc.add_paragraph('11. Acciones Correctivas Inmediatas')
+    doc.add_paragraph('12. Conclusión')
+    doc.add_paragraph('13. Firmas')
+    doc.add_paragraph("\n")
+
+    # Introducción y Objetivo
+    doc.add_heading('Introducción', level=1)
+    doc.add_paragraph(
+        "Los logs son registros detallados de eventos que ocurren dentro de un sistema. Estos registros son fundamentales para la monitorización, "
+        "diagnóstico y auditoría del sistema, proporcionando un rastro de actividades que permite a los administradores y desarrolladores "
+        "identificar y resolver problemas, asegurar el cumplimiento normativo y mantener la seguridad del sistema."
+    )
+    doc.add_heading('Objetivo de la Auditoría', level=1)
+    doc.add_paragraph(
+        "El objetivo de esta auditoría es evaluar el estado actual del sistema mediante el análisis de los logs generados, identificar patrones de "
+        "comportamiento anómalo, y determinar las áreas que requieren atención para mejorar la estabilidad, rendimiento y seguridad del sistema."
+    )
+
+    # Metodología
+    doc.add_heading('Metodología', level=1)
+    doc.add_paragraph(
+        "La auditoría fue realizada utilizando una herramienta automatizada que analiza los archivos de logs generados por el sistema. "
+        "Los logs se clasificaron en diferentes categorías (errores, advertencias, eventos críticos) basándose en palabras clave y patrones "
+        "predefinidos. Se realizó un análisis estadístico y se generaron explicaciones detalladas para cada tipo de log."
+    )
+
+    # Resumen Ejecutivo
+    doc.add_heading('Resumen Ejecutivo', level=1)
+    doc.add_paragraph(
+        f"Se analizaron un total de {total_logs} logs, de los cuales {resumen['Errores']} fueron clasificados como errores, "
+        f"{resumen['Advertencias']} como advertencias y {resumen['Eventos críticos']} como eventos críticos. "
+        "La auditoría identificó varios problemas críticos que requieren atención inmediata."
+    )
+    doc.add_paragraph(
+        "El análisis mostró que los errores más comunes están relacionados con problemas de conectividad y sobrecarga de recursos. "
+        "Las advertencias se centraron en intentos de acceso no autorizado y problemas de seguridad menores. Los eventos críticos "
+        "indicaron interrupciones significativas del sistema que podrían afectar la disponibilidad del servicio."
+    )
+
+    # Análisis de Errores
+    doc.add_heading('Análisis de Errores', level=1)
+    if agrupado:
+        agregar_tablas_agrupadas(doc, 'Mensaje del Error', errores, limite_filas, detalle_csv=detalle_csv)
+    else:
+        agregar_tabla_detalle(doc, 'Mensaje del Error', errores)
+
+    # Análisis de Advertencias
+    doc.add_heading('Análisis de Advertencias', level=1)
+    if agrupado:
+        agregar_tablas_agrupadas(doc, 'Mensaje de la Advertencia', advertencias, limite_filas, detalle_csv=detalle_csv)
+    else:
+        agregar_tabla_detalle(doc, 'Mensaje de la Advertencia', advertencias)
+
+    # Análisis de Eventos Críticos
+    doc.add_heading('Análisis de Eventos Críticos', level=1)
+    if agrupado:
+        agregar_tablas_agrupadas(doc, 'Mensaje del Evento Crítico', eventos_criticos, limite_filas, detalle_csv=detalle_csv)
+    else:
+        agregar_tabla_detalle(doc, 'Mensaje del Evento Crítico', eventos_criticos)
+
+    # Patrones Recurrentes y Observaciones
+    doc.add_heading('Patrones Recurrentes y Observaciones', level=1)
+    if patrones is None:
+        patrones = combinar_patrones(errores, advertencias, eventos_criticos, otros_eventos)
+    agregar_patrones_recurrentes(doc, patrones)
+
+    # Impacto Potencial de los Problemas Identificados
+    doc.add_heading('Impacto Potencial de los Problemas Identificados', level=1)
+    doc.add_paragraph(
+        "Los problemas identificados en esta auditoría podrían tener un impacto significativo en la operación y seguridad del sistema. "
+        "Los errores de conectividad y las sobrecargas de recursos pueden llevar a tiempos de inactividad, afectando la disponibilidad del servicio. "
+        "Los intentos de acceso no autorizado y las brechas de seguridad podrían comprometer datos sensibles y la integridad del sistema."
+    )
+
+    # Recomendaciones Detalladas
+    doc.add_heading('Recomendaciones Detalladas', level=1)
+    doc.add_paragraph(
+        "Para abordar los problemas identificados, se recomiendan las siguientes acciones específicas:\n"
+        "1. **Monitoreo Continuo:** Implementar herramientas de monitoreo para detectar y alertar sobre problemas de conectividad y sobrecarga en tiempo real.\n"
+        "2. **Fortalecimiento de la Seguridad:** Revisar y actualizar las políticas de seguridad para prevenir accesos no autorizados, incluyendo autenticación de múltiples factores.\n"
+        "3. **Optimización de Recursos:** Realizar un análisis de rendimiento para identificar y eliminar cuellos de botella, mejorando así la eficiencia del sistema.\n"
+        "4. **Actualización de la Infraestructura:** Considerar la actualización del hardware o la ampliación de la capacidad del servidor para manejar mejor la carga y los picos de tráfico.\n"
+        "5. **Capacitación del Personal:** Asegurar que el personal esté capacitado para responder a incidentes de seguridad y para utilizar herramientas de monitoreo y diagnóstico de manera efectiva.\n"
+        "6. **Revisión Periódica de Logs:** Establecer un calendario de revisión de logs para identificar problemas emergentes antes de que se conviertan en críticos.\n"
+        "7. **Auditorías de Seguridad:** Realizar auditorías de seguridad regulares para identificar vulnerabilidades y asegurar que las políticas de seguridad se estén aplicando correctamente."
+    )
+
+    # Acciones Correctivas Inmediatas
+    doc.add_heading('Acciones Correctivas Inmediatas', level=1)
+    doc.add_paragraph(
+        "Basado en los hallazgos de esta auditoría, se recomiendan las siguientes acciones correctivas inmediatas para mitigar los riesgos identificados:\n"
+        "1. **Resolver Problemas de Conectividad:** Identificar y solucionar los problemas de conexión a la base de datos para asegurar la disponibilidad continua del servicio.\n"
+        "2. **Aumentar la Capacidad de Almacenamiento:** Revisar y expandir la capacidad de almacenamiento para evitar problemas relacionados con el espacio en disco insuficiente.\n"
+        "3. **Implementar Monitoreo de Seguridad:** Instalar herramientas de monitoreo que alerten automáticamente sobre intentos de acceso no autorizado y brechas de seguridad.\n"
+        "4. **Optimización de Procesos de Backup:** Asegurarse de que los procesos de respaldo de datos estén configurados correctamente y que se realicen regularmente sin fallos.\n"
+        "5. **Actualizar Configuraciones de Tiempo de Sesión:** Revisar y ajustar las configuraciones de tiempo de sesión para evitar cierres inesperados de sesión de usuario debido a configuraciones demasiado estrictas."
+    )
+
+    # Conclusión
+    doc.add_heading('Conclusión', level=1)
+    doc.add_paragraph(
+        "La auditoría de logs realizada proporciona una visión integral del estado actual del sistema, identificando tanto problemas críticos como áreas de mejora. "
+        "Es evidente que existen problemas de conectividad y sobrecarga de recursos que deben ser abordados para asegurar la estabilidad y disponibilidad del sistema. "
+        "Asi mismo, los intentos de acceso no autorizado resaltan la necesidad de mejorar las medidas de seguridad. Implementar las recomendaciones propuestas ayudará a mitigar estos riesgos, mejorar la eficiencia y garantizar la integridad y seguridad del sistema a largo plazo."
+    )
+    doc.add_paragraph(
+        "Se recomienda realizar auditorías de logs periódicamente para mantener un control continuo sobre el estado del sistema y responder proactivamente a cualquier "
+        "incidencia que pudiera surgir. La adopción de una estrategia de monitoreo continuo y la actualización regular de políticas y procedimientos de seguridad serán clave para mantener la resiliencia del sistema ante futuros desafíos."
+    )
+
+    # Firma del Auditor
+    doc.add_heading('Firmas', level=1)
+    doc.add_paragraph("Firma del Auditor: __________________________")
+    doc.add_paragraph("Nombre del Auditor: [Nombre del Auditor]")
+    doc.add_paragraph("\n")
+
+    # Guardar el documento en un buffer en memoria
+    buffer = BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    
+    return buffer
@@ -0,0 +1,221 @@
+import io
+import sys
+import json
+import time
+import pstats
+import cProfile
+import platform
+import datetime
+import contextlib
+import tracemalloc
+from collections import Counter
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Instrumentación de la auditoría de logs: tiempo de cada etapa, filas por segundo, bytes leídos,
+# memoria máxima y aciertos por regla del clasificador, exportables como JSON para comparar
+# ejecuciones entre versiones. Opcionalmente captura un perfil de cProfile y activa tracemalloc
+# para medir el pico de memoria de cada etapa; ambas capturas ralentizan el análisis.
+
+# Versión del formato de las métricas exportadas
+VERSION_METRICAS = 1
+
+# Número de funciones del perfil y de líneas con más memoria reservada incluidas en las métricas
+LIMITE_PERFIL = 30
+
+# Clave de los eventos que no coinciden con ninguna regla en los aciertos por regla
+NO_RECONOCIDO = 'no_reconocido'
+
+# Memoria residente máxima del proceso en bytes, o None si la plataforma no la ofrece
+def memoria_maxima_proceso():
+    if resource is None:
+        return None
+    maxima = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxima if sys.platform == 'darwin' else maxima * 1024
+
+# Medidas acumuladas de una etapa; si se mide varias veces (por ejemplo una vez por archivo) se suman
+class EtapaMedida:
+    __slots__ = ('nombre', 'segundos', 'filas', 'bytes_leidos', 'pico_memoria', 'memoria_proceso', 'veces')
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.segundos = 0.0
+        self.filas = 0
+        self.bytes_leidos = 0
+        self.pico_memoria = None
+        self.memoria_proceso = None
+        self.veces = 0
+
+    def filas_por_segundo(self):
+        return self.filas / self.segundos if self.filas and self.segundos else None
+
+    def a_dict(self):
+        filas_por_segundo = self.filas_por_segundo()
+        return {
+            'etapa': self.nombre,
+            'segundos': round(self.segundos, 6),
+            'filas': self.filas,
+            'filas_por_segundo': round(filas_por_segundo, 1) if filas_por_segundo else None,
+            'bytes_leidos': self.bytes_leidos,
+            'pico_memoria_bytes': self.pico_memoria,
+            'memoria_maxima_proceso_bytes': self.memoria_proceso,
+            'veces': self.veces,
+        }
+
+# Instrumentación de una ejecución; se usa como gestor de contexto alrededor de toda la ejecución
+# y se pasa a las funciones del análisis, que miden sus etapas con medir_etapa y medir_iterable.
+# El tiempo de una etapa no incluye el de las etapas medidas dentro de ella, así que la suma de
+# las etapas no cuenta dos veces el mismo tiempo (por ejemplo, la lectura de los registros, que se
+# hace a medida que el análisis los consume, se descuenta del tiempo del análisis).
+class Instrumentacion:
+    def __init__(self, perfilar=False, memoria=False):
+        self.perfilar = perfilar
+        self.memoria = memoria
+        self.etapas = {}
+        self.aciertos_reglas = Counter()
+        self.segundos = 0.0
+        self.perfil = None
+        self.asignaciones = None
+        self._abiertas = []
+        self._inicio = None
+        self._perfilador = None
+        self._tracemalloc_propio = False
+
+    def __enter__(self):
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracemalloc_propio = True
+        if self.perfilar:
+            self._perfilador = cProfile.Profile()
+            try:
+                self._perfilador.enable()
+            except ValueError as e:
+                # Otro perfilador activo en el proceso (por ejemplo otra sesión de Streamlit)
+                self.perfil = f"Perfil no disponible: {e}"
+                self._perfilador = None
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        self.segundos += time.perf_counter() - self._inicio
+        if self._perfilador is not None:
+            self._perfilador.disable()
+            salida = io.StringIO()
+            pstats.Stats(self._perfilador, stream=salida).sort_stats('cumulative').print_stats(LIMITE_PERFIL)
+            self.perfil = salida.getvalue()
+            self._perfilador = None
+        if self.memoria and tracemalloc.is_tracing():
+            estadisticas = tracemalloc.take_snapshot().statistics('lineno')[:LIMITE_PERFIL]
+            self.asignaciones = [str(estadistica) for estadistica in estadisticas]
+            if self._tracemalloc_propio:
+                tracemalloc.stop()
+                self._tracemalloc_propio = False
+        return False
+
+    def _etapa(self, nombre):
+        etapa = self.etapas.get(nombre)
+        if etapa is None:
+            etapa = self.etapas[nombre] = EtapaMedida(nombre)
+        return etapa
+
+    # Mide el bloque como la etapa 'nombre' y devuelve la etapa para que el bloque sume sus filas y bytes
+    @contextlib.contextmanager
+    def etapa(self, nombre):
+        etapa = self._etapa(nombre)
+        medir_memoria = tracemalloc.is_tracing()
+        if medir_memoria:
+            if self._abiertas:
+                abierta = self._abiertas[-1]
+                abierta[2] = max(abierta[2], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        # [etapa, tiempo de etapas interiores, pico de memoria de etapas interiores]
+        abierta = [etapa, 0.0, 0]
+        self._abiertas.append(abierta)
+        inicio = time.perf_counter()
+        try:
+            yield etapa
+        finally:
+            segundos = time.perf_counter() - inicio
+            self._abiertas.pop()
+            etapa.segundos += segundos - abierta[1]
+            etapa.veces += 1
+            if self._abiertas:
+                self._abiertas[-1][1] += segundos
+            if medir_memoria and tracemalloc.is_tracing():
+                pico = max(abierta[2], tracemalloc.get_traced_memory()[1])
+                etapa.pico_memoria = max(etapa.pico_memoria or 0, pico)
+                if self._abiertas:
+                    self._abiertas[-1][2] = max(self._abiertas[-1][2], pico)
+            etapa.memoria_proceso = memoria_maxima_proceso()
+
+    # Recorre un iterable sumando a la etapa 'nombre' el tiempo de obtener cada elemento y el número
+    # de elementos. Sirve para medir generadores perezosos, como la lectura de registros, que se
+    # ejecutan intercalados con la etapa que los consume.
+    def medir_iterable(self, iterable, nombre):
+        etapa = self._etapa(nombre)
+        etapa.veces += 1
+        iterador = iter(iterable)
+        reloj = time.perf_counter
+        segundos = filas = 0
+        try:
+            while True:
+                inicio = reloj()
+                try:
+                    elemento = next(iterador)
+                except StopIteration:
+                    segundos += reloj() - inicio
+                    return
+                segundos += reloj() - inicio
+                filas += 1
+                yield elemento
+        finally:
+            etapa.segundos += segundos
+            etapa.filas += filas
+            if self._abiertas:
+                self._abiertas[-1][1] += segundos
+
+    # Suma filas y bytes leídos a la etapa 'nombre' sin medir tiempo, para los datos que solo se
+    # conocen después de la etapa
+    def sumar(self, nombre, filas=0, bytes_leidos=0):
+        etapa = self._etapa(nombre)
+        etapa.filas += filas
+        etapa.bytes_leidos += bytes_leidos
+
+    # Suma los aciertos por regla (identificador de regla o None para los no reconocidos)
+    def contar_aciertos(self, aciertos):
+        self.aciertos_reglas.update(aciertos)
+
+    def a_dict(self):
+        return {
+            'version_metricas': VERSION_METRICAS,
+            'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'segundos_total': round(self.segundos, 6),
+            'memoria_maxima_proceso_bytes': memoria_maxima_proceso(),
+            'etapas': [etapa.a_dict() for etapa in self.etapas.values()],
+            'aciertos_reglas': {
+                NO_RECONOCIDO if regla is None else regla: cantidad for regla, cantidad in self.aciertos_reglas.items()
+            },
+            'perfil': self.perfil,
+            'asignaciones_memoria': self.asignaciones,
+        }
+
+    def a_json(self):
+        return json.dumps(self.a_dict(), ensure_ascii=False, indent=2)
+
+# Mide un bloque como etapa de la instrumentación indicada; sin instrumentación no mide nada y
+# devuelve una etapa descartable para que el código medido no tenga que comprobarlo
+def medir_etapa(instrumentacion, nombre):
+    if instrumentacion is None:
+        return contextlib.nullcontext(EtapaMedida(nombre))
+    return instrumentacion.etapa(nombre)
+
+# Mide un iterable como etapa de la instrumentación indicada; sin instrumentación lo devuelve tal cual
+def medir_iterable(instrumentacion, iterable, nombre):
+    if instrumentacion is None:
+        return iterable
+    return instrumentacion.medir_iterable(iterable, nombre)
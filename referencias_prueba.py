@@ -0,0 +1,132 @@
+import random
+import string
+
+from auditoria_logs import REGLAS, COLUMNAS_LOG
+from generador_logs import GeneradorLogs
+
+# Referencias y datos de prueba compartidos por las pruebas (test_auditoria_logs.py) y los benchmarks
+# (benchmark.py): la cadena if/elif original del clasificador, recorridos equivalentes y generadores
+# de reglas, mensajes y DataFrames sintéticos. Solo depende de la biblioteca estándar y de los
+# módulos del proyecto; numpy y pandas se importan en la función que los usa.
+
+# Genera reglas sintéticas de tres palabras para ampliar la tabla de reglas real
+def reglas_sinteticas(cantidad, semilla=0):
+    aleatorio = random.Random(semilla)
+    reglas = []
+    for i in range(cantidad):
+        palabra = ''.join(aleatorio.choices(string.ascii_lowercase, k=8))
+        reglas.append((f'sintetica_{i}', f"Synthetic {palabra} event {i}", f"Explicación sintética {i}."))
+    return reglas
+
+# Genera mensajes con una mezcla de textos reconocidos y no reconocidos
+def mensajes_de_prueba(reglas, cantidad, semilla=0):
+    aleatorio = random.Random(semilla)
+    textos = [texto for _, texto, _ in reglas]
+    desconocidos = [f"Unexpected condition in worker {i}" for i in range(10)]
+    return [
+        f"host-{aleatorio.randint(1, 50)} app[{aleatorio.randint(100, 999)}]: {aleatorio.choice(textos + desconocidos)} (id={aleatorio.randint(0, 10**6)})"
+        for _ in range(cantidad)
+    ]
+
+# Recorrido lineal equivalente a la cadena if/elif original, usado como referencia
+def clasificacion_lineal(reglas):
+    textos = [texto for _, texto, _ in reglas]
+
+    def buscar(message):
+        for posicion, texto in enumerate(textos):
+            if texto in message:
+                return posicion
+        return -1
+    return buscar
+
+# Cadena if/elif como la de generar_explicacion original para cualquier tabla de reglas: una
+# comprobación con 'in' por regla, en orden, generada como código para que no tenga el coste de un
+# bucle. Devuelve la posición de la primera regla presente en el mensaje, o -1.
+def cadena_if_elif(reglas):
+    codigo = 'def buscar(message):\n'
+    for posicion, (_, texto, _) in enumerate(reglas):
+        codigo += f'    if {texto!r} in message:\n        return {posicion}\n'
+    espacio = {}
+    exec(codigo + '    return -1\n', espacio)
+    return espacio['buscar']
+
+# Cadena if/elif de generar_explicacion anterior al clasificador compilado, copiada sin cambios como
+# referencia del orden de prioridad de las reglas y del rendimiento
+def generar_explicacion_original(log):
+    message = log[1]
+    if "Database connection failed" in message:
+        return "Fallo en la conexión con la base de datos. Esto podría deberse a credenciales incorrectas, un problema con la red, o el servicio de base de datos no está disponible."
+    elif "Unable to reach API endpoint" in message:
+        return "No se pudo comunicar con el endpoint de la API. Verifique la URL del endpoint, la conectividad de red y la disponibilidad del servicio."
+    elif "Failed to back up database" in message:
+        return "La copia de seguridad falló. Posibles causas incluyen falta de espacio en disco, permisos insuficientes, o problemas con el servicio de respaldo."
+    elif "High memory usage detected" in message:
+        return "Uso elevado de memoria detectado. Revise los procesos en ejecución, posibles fugas de memoria o configuraciones inadecuadas de aplicaciones."
+    elif "Disk space low" in message:
+        return "Espacio en disco insuficiente. Se recomienda liberar espacio eliminando archivos innecesarios o ampliar la capacidad de almacenamiento."
+    elif "Slow response time" in message:
+        return "El sistema responde lentamente. Podría ser debido a alta carga de CPU, cuellos de botella en el acceso a la base de datos, o problemas de red."
+    elif "System outage detected" in message:
+        return "Interrupción del sistema detectada. Verifique la integridad del hardware, la configuración de la red, y el estado de los servicios críticos."
+    elif "Security breach detected" in message:
+        return "Posible brecha de seguridad detectada. Revise los logs de acceso, cambie contraseñas comprometidas, y considere fortalecer las medidas de seguridad."
+    elif "Application crash" in message:
+        return "Una aplicación se bloqueó. Revise los registros de la aplicación para identificar la causa del fallo y considere implementar mecanismos de recuperación."
+    elif "User session timeout" in message:
+        return "La sesión del usuario expiró. Esto podría deberse a configuraciones de tiempo de espera muy bajas o a inactividad prolongada del usuario."
+    elif "Unauthorized access attempt" in message:
+        return "Intento de acceso no autorizado detectado. Revise los registros de seguridad para identificar al actor y considere aumentar las medidas de protección."
+    elif "Server overload" in message:
+        return "El servidor está sobrecargado. Considere optimizar las aplicaciones, balancear la carga o aumentar los recursos del servidor."
+    elif "Data synchronization error" in message:
+        return "Error en la sincronización de datos. Verifique las conexiones de red, la consistencia de datos y los procesos de sincronización."
+    elif "API rate limit exceeded" in message:
+        return "Límite de tasa de API excedido. Optimice las llamadas a la API para evitar exceder los límites y considere implementar un manejo de tasas."
+    elif "Invalid input detected" in message:
+        return "Se ha detectado una entrada inválida. Asegúrese de que los datos introducidos cumplen con los formatos y requisitos esperados."
+    elif "Password reset requested" in message:
+        return "Solicitud de restablecimiento de contraseña detectada. Verifique si se trata de una solicitud legítima y si es necesario tomar medidas adicionales."
+    elif "Failed login attempt detected" in message:
+        return "Intento de inicio de sesión fallido detectado. Puede ser indicativo de intentos de acceso no autorizados o errores en la autenticación del usuario."
+    elif "Session timeout" in message:
+        return "Tiempo de sesión agotado. Los usuarios han sido desconectados por inactividad prolongada o debido a políticas de seguridad."
+    elif "Scheduled report generated" in message:
+        return "Un informe programado se ha generado correctamente. Revise el contenido para asegurar que los datos presentados son precisos y relevantes."
+    elif "Customer record updated" in message:
+        return "El registro de un cliente ha sido actualizado. Verifique los cambios para asegurar que se reflejan correctamente en el sistema."
+    elif "Data export completed" in message:
+        return "Exportación de datos completada. Revise el archivo exportado para confirmar que todos los datos necesarios están presentes y son correctos."
+    elif "User logged in successfully" in message:
+        return "Inicio de sesión exitoso. El usuario ha accedido al sistema correctamente."
+    else:
+        return f"Evento no reconocido: {message}. Es necesario realizar un análisis detallado para identificar la causa y el impacto potencial."
+
+# Mensajes para comprobar el orden de prioridad: cada par de textos de reglas en los dos órdenes,
+# grupos de tres textos al azar y mensajes del generador de logs sintéticos
+def mensajes_de_verificacion(reglas, semilla=0):
+    aleatorio = random.Random(semilla)
+    textos = [texto for _, texto, _ in reglas]
+    mensajes = [f"{primero} / {segundo}" for primero in textos for segundo in textos]
+    mensajes += [' '.join(aleatorio.sample(textos, min(3, len(textos)))) for _ in range(10_000)]
+    mensajes += [registro.message for registro in GeneradorLogs(semilla).registros(50_000)]
+    return mensajes
+
+# DataFrame sintético con las columnas de un .xlsx de logs y un número limitado de mensajes distintos
+def dataframe_de_prueba(filas, mensajes_distintos, semilla=0):
+    import numpy as np
+    import pandas as pd
+    generador = np.random.default_rng(semilla)
+    mensajes = np.array(mensajes_de_prueba(REGLAS, mensajes_distintos, semilla), dtype=object)
+    severidades = np.array(['ERROR', 'WARNING', 'CRITICAL', 'INFO'], dtype=object)
+    return pd.DataFrame({
+        'Severity': severidades[generador.integers(0, len(severidades), filas)],
+        'Message': mensajes[generador.integers(0, len(mensajes), filas)],
+        'Timestamp': '2024-05-01 12:00:00',
+    })[COLUMNAS_LOG]
+
+# Firma comparable de un resultado parcial: total, eventos por grupo y eventos por intervalo de cada categoría
+def firma_parcial(resultado):
+    return [
+        (categoria.total, {clave: grupo.cantidad for clave, grupo in categoria.grupos.items()}, categoria.patrones.intervalos)
+        for categoria in resultado
+    ]
@@ -0,0 +1,222 @@
+import os
+import gzip
+import datetime
+import itertools
+
+import pytest
+
+import auditoria_logs
+from auditoria_logs import (
+    REGLAS, Clasificador, RegistroLog, parsear_lineas, detectar_formato, generar_explicacion, analizar_logs, analizar_logs_df, aciertos_reglas, analizar_archivos,
+    agrupar_eventos, minuto_evento, fecha_minuto, analizar_directorio_incremental, analizar_directorio_completo, combinar_patrones, generar_detalle_csv,
+    analizar_archivos_en_paralelo, dividir_archivo
+)
+from cache_resultados import CacheResultados
+from auditoria_cli import abrir_archivo
+from referencias_prueba import (
+    dataframe_de_prueba, generar_explicacion_original, mensajes_de_verificacion, reglas_sinteticas, clasificacion_lineal, firma_parcial
+)
+from generador_logs import GeneradorLogs
+
+# Pruebas de corrección que antes solo se comprobaban al ejecutar los benchmarks:
+#   python -m pytest -q
+
+def test_clasificador_igual_que_cadena_original():
+    diferentes = [
+        message for message in mensajes_de_verificacion(REGLAS)
+        if generar_explicacion(RegistroLog('INFO', message, '')) != generar_explicacion_original(RegistroLog('INFO', message, ''))
+    ]
+    assert diferentes == []
+
+@pytest.mark.parametrize('cantidad', [30, 50, 200])
+def test_clasificador_igual_que_recorrido_lineal(cantidad):
+    reglas = REGLAS + reglas_sinteticas(cantidad - len(REGLAS))
+    lineal, clasificador = clasificacion_lineal(reglas), Clasificador(reglas)
+    mensajes = mensajes_de_verificacion(reglas)[:50_000]
+    assert [clasificador.buscar(message) for message in mensajes] == [lineal(message) for message in mensajes]
+
+# Textos que se solapan (el final de uno es el principio de otro) y textos contenidos en otros
+def test_clasificador_textos_solapados():
+    reglas = [(f'r{posicion}', texto, f'e{posicion}') for posicion, texto in enumerate(['cde', 'abc', 'bcd', 'xbcdx', 'b', 'de'])]
+    lineal, clasificador = clasificacion_lineal(reglas), Clasificador(reglas)
+    mensajes = [''.join(partes) for longitud in range(1, 6) for partes in itertools.product('abcdex', repeat=longitud)]
+    assert [clasificador.buscar(message) for message in mensajes] == [lineal(message) for message in mensajes]
+
+# El formato que más líneas interpreta de la muestra es el que se prueba primero
+@pytest.mark.parametrize('formato, linea', [
+    ('iso', '2024-05-01 12:00:00,123 ERROR Database connection failed'),
+    ('corchetes', '[WARNING] 2024-05-01 12:00:00 Disk space low'),
+    ('syslog', 'May  1 12:00:00 host app[123]: CRITICAL System outage detected'),
+])
+def test_detectar_formato(formato, linea):
+    assert detectar_formato([linea] * 5)[0] == formato
+
+# Las líneas que no encajan en el formato detectado prueban los demás y, si ninguno coincide, se
+# conservan completas como mensaje sin severidad
+def test_parsear_lineas_formato_por_linea():
+    lineas = ['2024-05-01 12:00:00 ERROR Disk space low'] * 3 + [
+        '[warn] Slow response time',
+        'May  1 12:00:00 host app: err: Server overload',
+        'texto sin formato',
+    ]
+    assert list(parsear_lineas(lineas))[3:] == [
+        RegistroLog('WARNING', 'Slow response time', ''),
+        RegistroLog('ERROR', 'Server overload', 'May  1 12:00:00'),
+        RegistroLog('', 'texto sin formato', ''),
+    ]
+
+# Sin corchetes ni ':' el nivel solo se reconoce en mayúsculas: una palabra normal al principio del
+# mensaje no se toma como nivel ni se quita del mensaje
+@pytest.mark.parametrize('linea, registro', [
+    ('2024-05-01 12:00:00 Alert rule disabled by admin', ('', 'Alert rule disabled by admin')),
+    ('2024-05-01 12:00:00 Trace id abc started', ('', 'Trace id abc started')),
+    ('2024-05-01 12:00:00 ERRORS found in batch', ('', 'ERRORS found in batch')),
+    ('May  1 12:00:00 host app[1]: Notice of change', ('', 'Notice of change')),
+    ('2024-05-01 12:00:00 ALERT rule disabled', ('CRITICAL', 'rule disabled')),
+    ('2024-05-01 12:00:00 [error] Disk space low', ('ERROR', 'Disk space low')),
+    ('2024-05-01 12:00:00 Warning: Disk space low', ('WARNING', 'Disk space low')),
+    ('May  1 12:00:00 host app[1]: notice: of change', ('INFO', 'of change')),
+])
+def test_nivel_ambiguo(linea, registro):
+    severity, message, _ = next(parsear_lineas([linea]))
+    assert (severity, message) == registro
+
+# Un mensaje vacío en el análisis vectorizado no se reconoce, igual que en el análisis fila a fila
+def test_vectorizado_mensaje_vacio():
+    import numpy as np
+    import pandas as pd
+    df = pd.DataFrame({'Severity': 'ERROR', 'Message': ['Disk space low', np.nan, 'Database connection failed'], 'Timestamp': ''})
+    vectorizado = analizar_logs_df(df)
+    fila_a_fila = analizar_logs([RegistroLog(*fila) for fila in df.itertuples(index=False, name=None)])
+    assert [explicacion for _, explicacion in vectorizado[0]] == [explicacion for _, explicacion in fila_a_fila[0]]
+    assert aciertos_reglas(vectorizado) == aciertos_reglas(fila_a_fila)
+
+# Los grupos, los patrones y el CSV del análisis vectorizado, que se calculan por columnas, son los
+# mismos que los del análisis fila a fila, con fechas de texto, fechas de pandas, vacías o no válidas
+@pytest.mark.parametrize('fechas', ['texto', 'datetime'])
+def test_vectorizado_igual_que_fila_a_fila(fechas):
+    import pandas as pd
+    df = dataframe_de_prueba(5000, 300)
+    df.loc[::7, 'Message'] = 'Evento 12 desconocido en el nodo 34'
+    marcas = pd.Series(pd.date_range('2024-05-01', periods=len(df), freq='47s'))
+    if fechas == 'texto':
+        df['Timestamp'] = marcas.dt.strftime('%Y-%m-%d %H:%M:%S')
+        df.loc[::11, 'Timestamp'] = 'no es una fecha'
+    else:
+        df['Timestamp'] = marcas
+    df.loc[::13, 'Timestamp'] = None
+    vectorizado = analizar_logs_df(df)
+    fila_a_fila = analizar_logs([RegistroLog(*fila) for fila in df.itertuples(index=False, name=None)])
+
+    def grupos(eventos):
+        return [(grupo.mensaje, grupo.cantidad, grupo.primero, grupo.ultimo, grupo.explicacion) for grupo in agrupar_eventos(eventos)]
+
+    def patrones(resultado):
+        combinados = combinar_patrones(*resultado)
+        return combinados.ancho_minutos, combinados.intervalos, combinados.mensajes, combinados.sin_fecha
+
+    assert [grupos(eventos) for eventos in vectorizado] == [grupos(eventos) for eventos in fila_a_fila]
+    assert patrones(vectorizado) == patrones(fila_a_fila)
+    assert generar_detalle_csv(*vectorizado).getvalue() == generar_detalle_csv(*fila_a_fila).getvalue()
+
+# Los tipos de evento de cada categoría son los mismos en todos los modos de ejecución, y la primera
+# hora de cada grupo es la más temprana aunque el log rotado (anterior) se lea después del actual.
+# Los .gz se abren como en la línea de comandos, descomprimiéndolos al vuelo.
+@pytest.mark.parametrize('modo, comprimido', [
+    ({'compacto': True}, False), ({'vectorizado': True}, False), ({'procesos': 2}, False), ({'procesos': 2}, True)
+])
+def test_agrupacion_igual_en_todos_los_modos(tmp_path, modo, comprimido):
+    lineas = list(GeneradorLogs(0, fraccion_no_reconocidos=0.3).lineas(4000))
+    rutas = [tmp_path / 'app.log', tmp_path / ('app.log.1.gz' if comprimido else 'app.log.1')]
+    contenido = ('\n'.join(lineas[:2000]) + '\n').encode('latin-1')
+    rutas[1].write_bytes(gzip.compress(contenido) if comprimido else contenido)
+    rutas[0].write_text('\n'.join(lineas[2000:]) + '\n', encoding='latin-1')
+
+    def grupos(**opciones):
+        archivos = [abrir_archivo(str(ruta)) for ruta in rutas]
+        try:
+            resultado, _, _ = analizar_archivos(archivos, **opciones)
+        finally:
+            for archivo in archivos:
+                archivo.close()
+        return [
+            [(grupo.mensaje, grupo.cantidad, grupo.primero, grupo.ultimo, grupo.explicacion) for grupo in agrupar_eventos(eventos)]
+            for eventos in resultado
+        ]
+
+    secuencial = grupos()
+    assert sum(grupo[1] for categoria in secuencial for grupo in categoria) == len(lineas)
+    assert all(primero <= ultimo for categoria in secuencial for _, _, primero, ultimo, _ in categoria)
+    assert grupos(**modo) == secuencial
+
+# Los archivos en disco se dividen en los mismos fragmentos que su contenido en memoria, y cada
+# proceso lee el suyo con el mismo resultado
+def test_paralelo_lee_fragmentos_en_disco(tmp_path):
+    ruta = tmp_path / 'app.log'
+    ruta.write_text('\n'.join(GeneradorLogs(0).lineas(3000)) + '\n', encoding='latin-1')
+    datos = ruta.read_bytes()
+    en_disco = [(ruta_fragmento, fin - inicio) for _, (ruta_fragmento, inicio, fin) in dividir_archivo('app.log', str(ruta), 10_000)]
+    en_memoria = [len(fragmento) for _, fragmento in dividir_archivo('app.log', datos, 10_000)]
+    assert len(en_memoria) > 1
+    assert en_disco == [(str(ruta), longitud) for longitud in en_memoria]
+    resultados = [
+        firma_parcial(analizar_archivos_en_paralelo([('app.log', contenido)], 2, tamano_fragmento=10_000)[0])
+        for contenido in (str(ruta), datos)
+    ]
+    assert resultados[0] == resultados[1]
+
+# Un archivo cuya lectura falla no se guarda en la caché: el error se vuelve a mostrar en cada análisis
+@pytest.mark.parametrize('modo', [{}, {'vectorizado': True}, {'procesos': 2}])
+def test_cache_no_guarda_resultados_con_errores(tmp_path, monkeypatch, modo):
+    ruta = tmp_path / 'logs.csv'
+    ruta.write_text('Fecha,Texto\n2024-05-01,hola\n', encoding='utf-8')
+    cache, errores = CacheResultados(1 << 20), []
+    monkeypatch.setattr(auditoria_logs, '_manejador_errores', errores.append)
+    for _ in range(2):
+        with open(ruta, 'rb') as archivo:
+            analizar_archivos([archivo], cache=cache, **modo)
+    assert len(errores) == 2
+    assert cache.bytes_en_memoria == 0
+
+# Las fechas de syslog no tienen año: se toma el del momento del análisis, o el anterior si la fecha
+# sería futura, y no se queda guardado en la caché de fechas al cambiar de año
+def test_anio_fechas_syslog(monkeypatch):
+    def analizar_en(ahora):
+        class Fecha(datetime.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return ahora
+        monkeypatch.setattr(datetime, 'datetime', Fecha)
+        return [fecha_minuto(minuto_evento(timestamp)) for timestamp in ('Dec 31 23:59:58', 'Jan  5 09:00:00')]
+
+    assert analizar_en(datetime.datetime(2026, 1, 5, 10, 0)) == [datetime.datetime(2025, 12, 31, 23, 59), datetime.datetime(2026, 1, 5, 9, 0)]
+    assert analizar_en(datetime.datetime(2027, 6, 1)) == [datetime.datetime(2026, 12, 31, 23, 59), datetime.datetime(2027, 1, 5, 9, 0)]
+
+# El análisis incremental tras cada cambio del directorio da el mismo resultado que analizarlo de nuevo
+def test_incremental_igual_que_completo(tmp_path):
+    directorio, directorio_estado = tmp_path / 'logs', tmp_path / 'estado'
+    directorio.mkdir()
+    log = directorio / 'app.log'
+    lineas = GeneradorLogs(0).lineas(None)
+    siguiente = next(lineas)
+
+    def escribir(cantidad, final=''):
+        with open(log, 'a', encoding='latin-1', errors='replace', newline='\n') as archivo:
+            archivo.writelines(linea + '\n' for linea in itertools.islice(lineas, cantidad))
+            archivo.write(final)
+
+    def rotar():
+        os.replace(log, str(log) + '.1')
+        escribir(500)
+
+    pasos = [
+        lambda: escribir(5000),
+        lambda: None,
+        lambda: escribir(500, siguiente[:len(siguiente) // 2]),
+        lambda: escribir(0, siguiente[len(siguiente) // 2:] + '\n'),
+        rotar,
+    ]
+    for preparar in pasos:
+        preparar()
+        resultado, _ = analizar_directorio_incremental(str(directorio), directorio_estado=str(directorio_estado))
+        assert firma_parcial(resultado) == firma_parcial(analizar_directorio_completo(str(directorio)))